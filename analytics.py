@@ -0,0 +1,156 @@
+import threading
+
+import numpy as np
+
+import card_decks as cd
+import deck_cache as dcache
+from util_timer import timed
+
+# Collection statistics over the decks table.
+#
+# Only the ids are needed to count decks, so the decks table is loaded once
+# as one integer column per dimension (a few bytes per deck, no text, no
+# images) and every statistic is a vectorized np.bincount over those
+# columns. The columns are reloaded when card_decks.data_version() changes,
+# i.e. after any write, like deck_cache.
+
+# Reference table -> column of decks
+DIMENSIONS = {
+    "types": "type_id",
+    "numbers": "number_id",
+    "themes": "theme_id",
+    "games": "game_id",
+    "cities": "city_id",
+    "countries": "country_id",
+    "collections": "collection_id",
+    "manufacturers": "manufacturer_id",
+}
+
+FETCH_SIZE = 10000
+
+class DeckColumns:
+    """The decks table as NumPy arrays: ids, plus one column of ids per dimension"""
+    def __init__(self, ids, columns):
+        self.ids = ids
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.ids)
+
+_columns = None
+_columns_version = None
+_lock = threading.Lock()
+
+@timed()
+def load_columns():
+    """Reads the id columns of the decks table into NumPy arrays."""
+    conn = cd.connect()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT id, {', '.join(DIMENSIONS.values())} FROM decks ORDER BY id")
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=np.int64))
+    conn.close()
+
+    data = np.concatenate(chunks) if chunks else np.empty((0, len(DIMENSIONS) + 1), dtype=np.int64)
+    # The smallest integer type that holds each column's ids
+    columns = {
+        table: data[:, i + 1].astype(np.min_scalar_type(int(data[:, i + 1].max(initial=0))))
+        for i, table in enumerate(DIMENSIONS)
+    }
+    return DeckColumns(data[:, 0].copy(), columns)
+
+def columns():
+    """Returns the current DeckColumns, reloading them if the data changed."""
+    global _columns, _columns_version
+    version = cd.data_version()
+    with _lock:
+        if _columns_version == version:
+            return _columns
+    loaded = load_columns()
+    with _lock:
+        # Do not keep columns read while a write happened
+        if version == cd.data_version():
+            _columns, _columns_version = loaded, version
+    return loaded
+
+def mask(**ids):
+    """Returns a boolean array selecting the decks with all the given ids.
+
+    Args:
+        **ids: Reference table -> id, e.g. countries=3. None is ignored.
+
+    Returns:
+        numpy.ndarray: One bool per deck, or None if there is no filter.
+    """
+    data = columns()
+    selected = None
+    for table, id in ids.items():
+        if id is None:
+            continue
+        matches = data.columns[table] == id
+        selected = matches if selected is None else selected & matches
+    return selected
+
+@timed()
+def count_by(table, where=None):
+    """Counts the decks per id of a reference table.
+
+    Args:
+        table (str): The reference table (a key of DIMENSIONS).
+        where (numpy.ndarray, optional): Boolean mask of the decks to count.
+
+    Returns:
+        numpy.ndarray: The number of decks, indexed by id.
+    """
+    column = columns().columns[table]
+    if where is not None:
+        column = column[where]
+    return np.bincount(column, minlength=_id_count(table))
+
+@timed()
+def crosstab(row_table, column_table, where=None):
+    """Counts the decks per pair of ids of two reference tables.
+
+    Returns:
+        numpy.ndarray: 2-D array of counts, indexed by [row id, column id].
+    """
+    data = columns()
+    rows = data.columns[row_table].astype(np.int64)
+    cols = data.columns[column_table].astype(np.int64)
+    if where is not None:
+        rows, cols = rows[where], cols[where]
+    n_rows, n_cols = _id_count(row_table), _id_count(column_table)
+    # One bincount over the pairs, encoded as row * n_cols + column
+    return np.bincount(rows * n_cols + cols, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+
+@timed()
+def histogram(table, where=None):
+    """Counts the values of a reference table by their number of decks.
+
+    Returns:
+        numpy.ndarray: How many values have exactly k decks, indexed by k
+        (values without decks are left out).
+    """
+    counts = count_by(table, where)
+    return np.bincount(counts[counts > 0])
+
+def names(table):
+    """Returns the names of a reference table by id."""
+    return {record[0]: record[1] for record in dcache.get_records(table)}
+
+def labelled(counts, table):
+    """Pairs the non-zero counts of count_by() with their names, most decks first."""
+    table_names = names(table)
+    ids = np.flatnonzero(counts)
+    ids = ids[np.argsort(-counts[ids], kind="stable")]
+    return [(table_names.get(int(id), str(id)), int(counts[id])) for id in ids]
+
+def _id_count(table):
+    # Counts are indexed by id, so arrays go up to the largest id in use
+    column = columns().columns[table]
+    largest_id = max((record[0] for record in dcache.get_records(table)), default=0)
+    return max(largest_id, int(column.max(initial=0))) + 1
@@ -0,0 +1,4 @@
+# One module per page of the app, each with a render() function. baralhos.py
+# imports only the module of the page being shown, so heavy dependencies
+# (pandas, PyGithub, bcrypt, PIL) are imported by the pages that use them,
+# inside the code paths that need them.
@@ -0,0 +1,56 @@
+import base64
+import os
+
+import streamlit as st
+
+import auth
+import deck_cache as dcache
+
+tables_list = {
+    "Tipos de baralhos": "types",
+    "Temas": "themes", 
+    "Jogos": "games", 
+    "Cidades": "cities",
+    "Paises": "countries", 
+    "Coleções": "collections", 
+    "Fabricantes": "manufacturers",
+    "Número de cartas": "numbers"
+}
+
+tables_choice = {
+    "Tipos de baralhos": "Tipo de baralho",
+    "Temas": "Tema", 
+    "Jogos": "Tipo de jogo", 
+    "Cidades": "Cidade",
+    "Paises": "País", 
+    "Coleções": "Coleção", 
+    "Fabricantes": "Fabricante",
+    "Número de cartas": "Número de cartas"
+}
+
+def logged_in():
+    """Returns True if the session holds a valid login token."""
+    return auth.verify_token(st.session_state.auth_token) is not None
+
+def require_login():
+    """Stops the page if the user is not logged in."""
+    if not logged_in():
+        st.warning("Por favor faça login para aceder a esta página.")
+        st.stop()
+
+def lookup(table):
+    """Returns the records of a reference table as a {name: id} dict sorted by name."""
+    return dict(sorted({record[1]: record[0] for record in dcache.get_records(table)}.items()))
+
+# Base URL of a running service.py (e.g. https://baralhos.example.com/api).
+# When set, thumbnails are shown from its immutable /images/<hash>.jpg URLs,
+# which the browser caches, instead of being sent inline on every rerun.
+IMAGE_BASE_URL = os.environ.get("BARALHOS_IMAGE_BASE_URL", "").rstrip("/")
+
+def show_image(image_data, container=st, image_hash=None):
+    """Shows a base64 encoded deck thumbnail."""
+    if IMAGE_BASE_URL and image_hash:
+        container.image(f"{IMAGE_BASE_URL}/images/{image_hash}.jpg", width=200)
+        return
+    # st.image takes the encoded bytes directly, no need to decode with PIL
+    container.image(base64.b64decode(image_data), width=200)
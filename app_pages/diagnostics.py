@@ -0,0 +1,38 @@
+import streamlit as st
+
+from app_pages.common import require_login
+from util_timer import metrics
+
+# Hidden page, reached with ?page=diagnostics. Shows the timings recorded by
+# util_timer since the process started (or the last reset).
+
+def render():
+    st.header("Diagnóstico")
+
+    require_login()
+
+    summary = metrics.summary()
+    reruns = summary.get("app.rerun", {}).get("count", 0)
+    st.write(f"Execuções do script: {reruns}")
+
+    rows = [
+        {
+            "Nome": name,
+            "Chamadas": stats["count"],
+            "Total (ms)": round(stats["total"] * 1000, 2),
+            "Por execução (ms)": round(stats["total"] * 1000 / reruns, 2) if reruns else None,
+            "p50 (ms)": round(stats["p50"] * 1000, 2),
+            "p95 (ms)": round(stats["p95"] * 1000, 2),
+            "p99 (ms)": round(stats["p99"] * 1000, 2),
+            "Máximo (ms)": round(stats["max"] * 1000, 2),
+        }
+        for name, stats in sorted(summary.items(), key=lambda item: item[1]["total"], reverse=True)
+    ]
+    st.dataframe(rows, width="stretch")
+
+    st.download_button("Descarregar JSON", data=metrics.to_json(), file_name="metrics.json", mime="application/json")
+    st.download_button("Descarregar Prometheus", data=metrics.to_prometheus(), file_name="metrics.txt", mime="text/plain")
+
+    if st.button("Limpar métricas"):
+        metrics.reset()
+        st.rerun()
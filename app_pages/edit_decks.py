@@ -0,0 +1,114 @@
+import streamlit as st
+
+import card_decks as cd
+import deck_cache as dcache
+from app_pages.common import lookup, require_login, show_image
+
+def render():
+    st.header("Editar Baralhos de Cartas")
+
+    require_login()
+
+    # Edit Deck
+    decks = dcache.get_decks(with_images=False)
+    deck_names = cd.get_deck_names(decks)
+    selected_deck_name = st.selectbox("Selecione um baralho para editar:", deck_names, index=st.session_state.edit_deck_id)
+
+    if not selected_deck_name:
+        return
+
+    selected_deck_id = int(selected_deck_name.split(".")[0])
+    deck_details = dcache.get_deck_by_id(selected_deck_id)
+
+    if not deck_details:
+        st.error("Detalhes do baralho não encontrados.")
+        return
+
+    # Writes check the version of the deck as the previous run showed it,
+    # i.e. the values the user edited, so that they detect edits made
+    # meanwhile in another session. At the end of the run it is replaced by
+    # the version of the values shown now.
+    version_key = f"edit_deck_version_{selected_deck_id}"
+    expected_updated_at = st.session_state.get(version_key, deck_details[11])
+    shown_updated_at = deck_details[11]
+
+    # Images are changed one at a time, outside the form
+    st.write("Imagens existentes:")
+    deck_images = dcache.get_deck_images(selected_deck_id)
+    image_ids = [deck_image[0] for deck_image in deck_images]
+    for position, (image_id, image_hash, image_data) in enumerate(deck_images):
+        image_col, up_col, down_col, delete_col = st.columns([4, 1, 1, 1])
+        try:
+            show_image(image_data, image_col, image_hash)
+        except:
+            image_col.write("Erro a carregar imagem")
+
+        new_order = None
+        if up_col.button("↑", key=f"image_up_{image_id}", disabled=position == 0):
+            new_order = image_ids[:position - 1] + [image_id, image_ids[position - 1]] + image_ids[position + 1:]
+        if down_col.button("↓", key=f"image_down_{image_id}", disabled=position == len(image_ids) - 1):
+            new_order = image_ids[:position] + [image_ids[position + 1], image_id] + image_ids[position + 2:]
+        try:
+            if new_order:
+                cd.reorder_deck_images(selected_deck_id, new_order, expected_updated_at=expected_updated_at)
+                st.rerun()
+            if delete_col.button("Eliminar", key=f"image_delete_{image_id}"):
+                cd.delete_deck_image(selected_deck_id, image_id=image_id, expected_updated_at=expected_updated_at)
+                st.rerun()
+        except cd.ConcurrentEditError:
+            st.error("O baralho foi alterado noutra sessão. Recarregue a página e volte a aplicar as alterações.")
+
+    with st.form(f"edit_deck_form_{selected_deck_id}"):
+        type_dict = lookup("types")
+        type_name = st.selectbox("Tipo de baralho", list(type_dict.keys()), index=list(type_dict.keys()).index(deck_details[1]))
+
+        number_dict = lookup("numbers")
+        number_name = st.selectbox("Número de cartas", list(number_dict.keys()), index=list(number_dict.keys()).index(str(deck_details[2])))
+
+        theme_dict = lookup("themes")
+        theme_name = st.selectbox("Tema", list(theme_dict.keys()), index=list(theme_dict.keys()).index(deck_details[3]))
+
+        game_dict = lookup("games")
+        game_name = st.selectbox("Jogo", list(game_dict.keys()), index=list(game_dict.keys()).index(deck_details[4]))
+
+        city_dict = lookup("cities")
+        city_name = st.selectbox("Cidade", list(city_dict.keys()), index=list(city_dict.keys()).index(deck_details[5]))
+
+        country_dict = lookup("countries")
+        country_name = st.selectbox("País", list(country_dict.keys()), index=list(country_dict.keys()).index(deck_details[6]))
+
+        collection_dict = lookup("collections")
+        collection_name = st.selectbox("Coleção", list(collection_dict.keys()), index=list(collection_dict.keys()).index(deck_details[7]))
+
+        manufacturer_dict = lookup("manufacturers")
+        manufacturer_name = st.selectbox("Fabricante", list(manufacturer_dict.keys()), index=list(manufacturer_dict.keys()).index(deck_details[8]))
+
+        description = st.text_area("Descrição", value=deck_details[9])
+
+        uploaded_files = st.file_uploader("Adicionar imagens", accept_multiple_files=True, type=["png", "jpg", "jpeg"])
+
+        submitted = st.form_submit_button("Guardar alterações")
+        if submitted:
+            # New images are appended to the ones shown, in the same
+            # transaction (and version check) as the other changes
+            images = None
+            if uploaded_files:
+                images = [image_data for _, _, image_data in deck_images] + [uploaded_file.getvalue() for uploaded_file in uploaded_files]
+            try:
+                updated_at = cd.edit_deck(selected_deck_id, type_dict[type_name], number_dict[number_name], theme_dict[theme_name], game_dict[game_name],
+                            city_dict[city_name], country_dict[country_name], collection_dict[collection_name],
+                            manufacturer_dict[manufacturer_name], description, images=images,
+                            expected_updated_at=expected_updated_at)
+            except cd.ConcurrentEditError:
+                st.error("O baralho foi alterado noutra sessão. Recarregue a página e volte a aplicar as alterações.")
+            else:
+                if updated_at:
+                    # The form keeps showing the values just saved
+                    shown_updated_at = updated_at
+                    st.success("Baralho editado com sucesso!")
+                elif uploaded_files:
+                    st.error("Erro ao guardar o baralho ou ao processar as imagens.")
+                else:
+                    st.error("Erro ao guardar o baralho.")
+
+    st.session_state[version_key] = shown_updated_at
@@ -0,0 +1,49 @@
+import datetime
+import os
+import tempfile
+
+import streamlit as st
+
+import auth
+import card_decks as cd
+from app_pages.common import logged_in
+
+def render():
+    st.header("Ligar/Desligar")
+
+    with st.form("Ligar/Desligar"):
+        if not logged_in():
+            username = st.text_input("Utilizador")
+            password = st.text_input("Palavra passe", type="password")
+            submitted = st.form_submit_button("Ligar")
+            if submitted:
+                # Failed attempts are counted per IP address, or per session
+                # when it is not known
+                if "login_client" not in st.session_state:
+                    st.session_state.login_client = st.context.ip_address or os.urandom(8).hex()
+                try:
+                    st.session_state.auth_token = auth.login(username, password, st.session_state.login_client)
+                except auth.TooManyAttemptsError as e:
+                    st.error(f"Demasiadas tentativas falhadas. Tente novamente dentro de {e.retry_after:.0f} segundos.")
+                else:
+                    if st.session_state.auth_token:
+                        st.success(f"Bem vindo, {username}!. Já está ligado")
+                    else:
+                        st.error("Utilizador ou senha incorretos.")                
+        else:
+            st.warning("Já está ligado. Para atualizar a base de dados, desligue-se.")
+            submitted = st.form_submit_button("Desligar")
+            if submitted:
+                import db_maintenance
+                import util_github as ghub
+
+                github_token = auth.load_secrets().github_token
+                st.session_state.auth_token = None
+                date = 'database updated at ' + datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                # Upload a compacted copy (VACUUM INTO) of the database
+                with tempfile.TemporaryDirectory() as snapshot_dir:
+                    snapshot_path = os.path.join(snapshot_dir, "card_decks.db")
+                    db_maintenance.snapshot(snapshot_path)
+                    ghub.delete_from_github(github_token, "pbcachim/baralhos", "card_decks.db", date + '-del')
+                    ghub.upload_to_github(github_token, "pbcachim/baralhos", snapshot_path, date, local_path=cd.DB_PATH)
+                st.success(f"Desligado com sucesso!")
@@ -0,0 +1,60 @@
+import streamlit as st
+
+import card_decks as cd
+import deck_cache as dcache
+from app_pages.common import lookup, require_login
+
+def render():
+    st.header("Adicionar Baralhos de Cartas")
+
+    require_login()
+
+    # Add Deck
+    with st.form("add_deck_form"):
+        type_dict = lookup("types")
+        type_name = st.selectbox("Seleciona o tipo de baralho", list(type_dict.keys()))
+
+        number_dict = lookup("numbers")
+        number_name = st.selectbox("Seleciona o número de cartas do baralho", list(number_dict.keys()))
+
+        theme_dict = lookup("themes")
+        theme_name = st.selectbox("Seleciona o tema", list(theme_dict.keys()))
+
+        game_dict = lookup("games")
+        game_name = st.selectbox("Seleciona o jogo", list(game_dict.keys()))
+
+        city_dict = lookup("cities")
+        city_name = st.selectbox("Seleciona a cidade", list(city_dict.keys()))
+
+        country_dict = lookup("countries")
+        country_name = st.selectbox("Seleciona o país", list(country_dict.keys()))
+
+        collection_dict = lookup("collections")
+        collection_name = st.selectbox("Seleciona a coleção", list(collection_dict.keys()))
+
+        manufacturer_dict = lookup("manufacturers")
+        manufacturer_name = st.selectbox("Seleciona o fabricante", list(manufacturer_dict.keys()))
+
+        description = st.text_area("Descrição")
+
+        uploaded_files = st.file_uploader("Faça upload das imagens do baralho", accept_multiple_files=True, type=["png", "jpg", "jpeg"])
+
+        submitted = st.form_submit_button("Adicionar baralho")
+        if submitted:
+            image_paths = []
+            if uploaded_files:
+                for uploaded_file in uploaded_files:
+                    with open(uploaded_file.name, "wb") as f:
+                        f.write(uploaded_file.getbuffer())
+                        image_paths.append(uploaded_file.name)
+
+            cd.add_deck(type_dict[type_name], number_dict[number_name], theme_dict[theme_name], game_dict[game_name],
+                        city_dict[city_name], country_dict[country_name], collection_dict[collection_name],
+                        manufacturer_dict[manufacturer_name], description, image_paths)
+            st.success(f"Baralho adicionado com sucesso!")
+
+    # View Decks
+    st.subheader("Lista de baralhos")
+    decks = dcache.get_decks(with_images=False)
+    for deck in decks:
+        st.write(f"{deck[0]}. {deck[1]} - {deck[2]} cartas, Tema: {deck[3]}, Jogo: {deck[4]}, Cidade: {deck[5]}, País: {deck[6]}, Coleção: {deck[7]}, Fabricante: {deck[8]}, Descrição: {deck[9]}")
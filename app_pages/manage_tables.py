@@ -0,0 +1,32 @@
+import streamlit as st
+
+import card_decks as cd
+import deck_cache as dcache
+from app_pages.common import require_login, tables_choice, tables_list
+
+def render():
+    st.header("Definições")
+
+    require_login()
+
+    tables = tables_list.keys()
+    table_choice_pt = st.selectbox("Seleciona a tabela a modificar", tables)
+    table_choice = tables_list[table_choice_pt]
+
+    # Add Record
+    with st.form(f"add_{table_choice}_form"):
+        record_name = st.text_input(tables_choice[table_choice_pt])
+        submitted = st.form_submit_button("Adicionar")
+        if submitted and record_name:
+            if cd.add_record(table_choice, record_name):
+                st.success(f"Record '{record_name}' added successfully!")
+            else:
+                st.warning(f"Record '{record_name}' already exists or there was an error.") # More user-friendly message
+
+    # View and Delete Records
+    records = dcache.get_records(table_choice)
+    for record in records:
+        st.write(f"{record[0]}. {record[1]}")
+        if st.button(f"Eliminar {record[1]}", key=f"delete_{table_choice}_{record[0]}"):
+            cd.delete_record(table_choice, record[0])
+            st.success(f"{tables_choice[table_choice_pt]} '{record[1]}' eliminado com sucesso!")
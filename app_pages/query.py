@@ -0,0 +1,150 @@
+import io
+import os
+import tempfile
+
+import streamlit as st
+
+import card_decks as cd
+import deck_cache as dcache
+from app_pages.common import lookup, require_login, show_image
+
+def export_excel(filtered_decks):
+    """Returns the decks, without images, as the bytes of an xlsx file."""
+    import pandas as pd
+
+    df = pd.DataFrame(
+        filtered_decks,
+        columns=["ID", "Type", "Number of Cards", "Theme", "Game", "City", "Country", "Collection", "Manufacturer", "Description", "Images"]
+    )
+    df = df.drop(columns=["Images"])
+
+    buffer = io.BytesIO()
+
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        df.to_excel(writer, sheet_name='Sheet1', index=False)
+
+    return buffer.getvalue()
+
+def export_catalogue(filtered_decks):
+    """Writes the decks, with their images, to a PDF catalogue in a
+    temporary file and returns its path."""
+    import catalogue
+
+    fd, path = tempfile.mkstemp(prefix="catalogo-", suffix=".pdf")
+    os.close(fd)
+    # The workers read the images themselves, only pass the details
+    catalogue.build_catalogue([deck[:10] for deck in filtered_decks], path)
+    return path
+
+def render():
+    st.header("Listagem de Baralhos de Cartas")
+
+    require_login()
+
+    type_dict = lookup("types")
+    selected_type = st.selectbox("Filtrar por tipo de baralho", ["All"] + list(type_dict.keys()))
+
+    number_dict = lookup("numbers")
+    selected_number = st.selectbox("Filtrar por número de cartas", ["All"] + list(number_dict.keys()))
+
+    theme_dict = lookup("themes")
+    selected_theme = st.selectbox("Filtrar por tema", ["All"] + list(theme_dict.keys()))
+
+    game_dict = lookup("games")
+    selected_game = st.selectbox("Filtrar por tipo de jogo", ["All"] + list(game_dict.keys()))
+
+    city_dict = lookup("cities")
+    selected_city = st.selectbox("Filtrar por cidade", ["All"] + list(city_dict.keys()))
+
+    country_dict = lookup("countries")
+    selected_country = st.selectbox("Filtrar por país", ["All"] + list(country_dict.keys()))
+
+    collection_dict = lookup("collections")
+    selected_collection = st.selectbox("Filtrar por coleção", ["All"] + list(collection_dict.keys()))
+
+    manufacturer_dict = lookup("manufacturers")
+    selected_manufacturer = st.selectbox("Filtrar por fabricante", ["All"] + list(manufacturer_dict.keys()))
+
+    # Apply Filters
+    type_id = type_dict[selected_type] if selected_type != "All" else None
+    number_id = number_dict[selected_number] if selected_number != "All" else None
+    theme_id = theme_dict[selected_theme] if selected_theme != "All" else None
+    game_id = game_dict[selected_game] if selected_game != "All" else None
+    city_id = city_dict[selected_city] if selected_city != "All" else None
+    country_id = country_dict[selected_country] if selected_country != "All" else None
+    collection_id = collection_dict[selected_collection] if selected_collection != "All" else None
+    manufacturer_id = manufacturer_dict[selected_manufacturer] if selected_manufacturer != "All" else None
+
+    # The images of the selected deck are read with get_deck_images
+    filtered_decks = dcache.filter_decks(type_id, number_id, theme_id, game_id, city_id, country_id, collection_id, manufacturer_id, with_images=False)
+
+    # Display all decks in a selectbox
+    deck_names = cd.get_deck_names(filtered_decks)
+    selected_deck_name = st.selectbox("Selecione um baralho para ver detalhes:", deck_names) # Added empty string for no selection
+
+    if not filtered_decks:
+        st.info("Não existem baralhos a apresentar com os filtros selecionados.")
+        return
+
+    edit_button = False
+    if selected_deck_name:  # Check if a deck is selected
+        selected_deck_id = int(selected_deck_name.split(".")[0])
+        selected_deck_details = dcache.get_deck_by_id(selected_deck_id)
+
+        if selected_deck_details:
+            st.subheader(selected_deck_details[1])  # Display deck name as subheader
+            st.write(f"Tipo: {selected_deck_details[1]}")
+            st.write(f"Número de Cartas: {selected_deck_details[2]}")
+            st.write(f"Tema: {selected_deck_details[3]}")
+            st.write(f"Jogo: {selected_deck_details[4]}")
+            st.write(f"Cidade: {selected_deck_details[5]}")
+            st.write(f"País: {selected_deck_details[6]}")
+            st.write(f"Coleção: {selected_deck_details[7]}")
+            st.write(f"Fabricante: {selected_deck_details[8]}")
+            st.write(f"Descrição: {selected_deck_details[9]}")
+
+            deck_images = dcache.get_deck_images(selected_deck_id)
+            if deck_images:
+                st.subheader("Imagens:")
+                for _, image_hash, image_data in deck_images:
+                    try:
+                        show_image(image_data, image_hash=image_hash)
+                    except Exception as e:
+                        st.error(f"Erro ao exibir imagem: {e}")
+
+            edit_button = st.button(f"Editar baralho", key=f"edit_button_{selected_deck_id}")
+        else:
+            st.error("Detalhes do baralho não encontrados.")
+
+    # The xlsx (and pandas) is only built when the button is clicked
+    st.download_button(
+        label="Descarregar como Excel",
+        data=lambda: export_excel(filtered_decks),
+        file_name="filtered_decks.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+    # The catalogue takes a while to render, so only on request. It is kept
+    # on disk (the session only holds its path) for as long as the same
+    # decks are listed
+    deck_ids = tuple(deck[0] for deck in filtered_decks)
+    if st.button("Gerar catálogo PDF"):
+        with st.spinner("A gerar o catálogo..."):
+            path = export_catalogue(filtered_decks)
+        previous = st.session_state.get("catalogue")
+        if previous and os.path.exists(previous[1]):
+            os.remove(previous[1])
+        st.session_state.catalogue = (deck_ids, path)
+    catalogue_ids, catalogue_path = st.session_state.get("catalogue", (None, None))
+    if catalogue_ids == deck_ids and os.path.exists(catalogue_path):
+        with open(catalogue_path, "rb") as f:
+            st.download_button(
+                label="Descarregar catálogo PDF",
+                data=f,
+                file_name="catalogo_baralhos.pdf",
+                mime="application/pdf"
+            )
+
+    if edit_button:
+        st.session_state.edit_deck_id = selected_deck_id
+        st.session_state.choice_id = 3
@@ -0,0 +1,58 @@
+import numpy as np
+import streamlit as st
+
+import analytics
+from app_pages.common import require_login, tables_choice, tables_list
+
+def render():
+    st.header("Estatísticas da Coleção")
+
+    require_login()
+
+    import pandas as pd
+
+    decks = analytics.columns()
+    st.metric("Baralhos", len(decks))
+    if not len(decks):
+        st.info("Não existem baralhos na coleção.")
+        return
+
+    labels = list(tables_list.keys())
+
+    # Decks per value of one table
+    group_label = st.selectbox("Agrupar por", labels, index=labels.index("Paises"))
+    group_table = tables_list[group_label]
+    counts = analytics.labelled(analytics.count_by(group_table), group_table)
+    df = pd.DataFrame(counts, columns=[tables_choice[group_label], "Baralhos"]).set_index(tables_choice[group_label])
+    st.bar_chart(df)
+    st.dataframe(df, width="stretch")
+
+    # Number of values of the table by their number of decks
+    st.subheader("Distribuição")
+    distribution = analytics.histogram(group_table)
+    st.bar_chart(pd.DataFrame(
+        {f"{group_label} com este número de baralhos": distribution},
+        index=pd.Index(np.arange(len(distribution)), name="Baralhos"),
+    ).iloc[1:])
+
+    # Decks per pair of values of two tables
+    st.subheader("Tabela cruzada")
+    row_label = st.selectbox("Linhas", labels, index=labels.index("Paises"))
+    column_label = st.selectbox("Colunas", labels, index=labels.index("Fabricantes"))
+    row_table, column_table = tables_list[row_label], tables_list[column_label]
+    matrix = analytics.crosstab(row_table, column_table)
+
+    # Only the values that have decks, largest totals first
+    row_ids = np.flatnonzero(matrix.sum(axis=1))
+    row_ids = row_ids[np.argsort(-matrix[row_ids].sum(axis=1), kind="stable")]
+    column_ids = np.flatnonzero(matrix.sum(axis=0))
+    column_ids = column_ids[np.argsort(-matrix[:, column_ids].sum(axis=0), kind="stable")]
+    row_names, column_names = analytics.names(row_table), analytics.names(column_table)
+    st.dataframe(
+        pd.DataFrame(
+            matrix[np.ix_(row_ids, column_ids)],
+            index=[row_names.get(int(id), str(id)) for id in row_ids],
+            columns=[column_names.get(int(id), str(id)) for id in column_ids],
+        ),
+        width="stretch",
+    )
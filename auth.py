@@ -0,0 +1,161 @@
+import collections
+import functools
+import hashlib
+import hmac
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from util_timer import timed
+
+# Login for the Streamlit app.
+#
+# The secrets are read once per process. A successful login costs one bcrypt
+# check and returns a signed session token, kept in st.session_state; every
+# rerun after that only verifies the token's HMAC. Failed attempts are
+# counted per client (IP address or session), whatever the user name, so an
+# anonymous visitor cannot lock the only user out. Each attempt is counted
+# as a failure before bcrypt runs, and taken back if it succeeds, so once a
+# client has too many the password is not even checked, even for concurrent
+# attempts. Only the last MAX_FAILED_ATTEMPTS of the last MAX_CLIENTS
+# clients are kept. Unknown user names are checked against a dummy hash of
+# the same cost, so the response time does not reveal whether a user name
+# exists.
+
+TOKEN_TTL = 12 * 60 * 60  # Seconds a session token stays valid
+MAX_FAILED_ATTEMPTS = 5
+LOCKOUT_SECONDS = 5 * 60
+MAX_CLIENTS = 1024  # Clients whose failed attempts are remembered
+
+class TooManyAttemptsError(Exception):
+    """Raised when logins are locked out after too many failed attempts."""
+    def __init__(self, retry_after):
+        super().__init__(f"Too many failed login attempts, retry in {retry_after:.0f} s")
+        self.retry_after = retry_after
+
+@dataclass(frozen=True)
+class Secrets:
+    username: str
+    password_hash: bytes
+    github_token: str
+    session_key: bytes
+
+@functools.lru_cache(maxsize=None)
+def load_secrets():
+    """Reads the app secrets once per process.
+
+    Missing values are None. The session tokens are signed with
+    SESSION_SECRET when it is set, otherwise with a random key, which
+    invalidates them when the process restarts.
+
+    Returns:
+        Secrets: The secrets.
+    """
+    import streamlit as st
+
+    try:
+        values = dict(st.secrets)
+    except FileNotFoundError:
+        values = {}
+    password = values.get("VALID_PASSWORD")
+    session_secret = values.get("SESSION_SECRET")
+    return Secrets(
+        username=values.get("VALID_USERNAME"),
+        password_hash=password.encode('utf-8') if password else None,
+        github_token=values.get("GITHUB_TOKEN"),
+        session_key=session_secret.encode('utf-8') if session_secret else os.urandom(32),
+    )
+
+# Times of the last failed attempts by client, least recently used first
+_failures = collections.OrderedDict()
+_failures_lock = threading.Lock()
+
+def _reserve_attempt(client):
+    # Counts the attempt as failed before the password is checked, and
+    # returns its time to take it back with _release_attempt
+    with _failures_lock:
+        now = time.monotonic()
+        failures = _failures.pop(client, None)
+        if failures is None:
+            failures = collections.deque(maxlen=MAX_FAILED_ATTEMPTS)
+        _failures[client] = failures
+        while len(_failures) > MAX_CLIENTS:
+            _failures.popitem(last=False)
+        if len(failures) == MAX_FAILED_ATTEMPTS and now - failures[0] < LOCKOUT_SECONDS:
+            raise TooManyAttemptsError(LOCKOUT_SECONDS - (now - failures[0]))
+        failures.append(now)
+        return now
+
+def _release_attempt(client, reserved):
+    with _failures_lock:
+        failures = _failures.get(client)
+        if failures is not None and reserved in failures:
+            failures.remove(reserved)
+
+@functools.lru_cache(maxsize=None)
+def _dummy_hash(password_hash):
+    # A hash with the same cost as the real one ($2b$<cost>$...)
+    import bcrypt
+
+    return bcrypt.hashpw(os.urandom(16), bcrypt.gensalt(rounds=int(password_hash.split(b"$")[2])))
+
+def _sign(secrets, message):
+    # Signed together with the password hash: changing the password
+    # invalidates the tokens already issued
+    return hmac.new(secrets.session_key, message.encode('utf-8') + secrets.password_hash, hashlib.sha256).hexdigest()
+
+@timed()
+def login(username, password, client=None):
+    """Checks a user name and password.
+
+    Args:
+        username (str): The user name.
+        password (str): The password.
+        client (str, optional): Identifies who is logging in (an IP address
+            or session id), for counting the failed attempts.
+
+    Returns:
+        str: A session token, or None if the credentials are wrong.
+
+    Raises:
+        TooManyAttemptsError: If the client had too many failed attempts recently.
+    """
+    import bcrypt
+
+    secrets = load_secrets()
+    if not secrets.username or not secrets.password_hash:
+        return None
+    reserved = _reserve_attempt(client)
+
+    # One bcrypt check either way, so unknown user names take as long (the
+    # dummy hash is made on the first login, whatever the user name)
+    dummy_hash = _dummy_hash(secrets.password_hash)
+    known_user = username == secrets.username
+    password_hash = secrets.password_hash if known_user else dummy_hash
+    if bcrypt.checkpw(password.encode('utf-8'), password_hash) and known_user:
+        _release_attempt(client, reserved)
+        expires = int(time.time()) + TOKEN_TTL
+        message = f"{username}|{expires}"
+        return f"{message}|{_sign(secrets, message)}"
+    return None
+
+def verify_token(token):
+    """Checks a session token issued by login().
+
+    Returns:
+        str: The user name, or None if the token is missing, forged or expired.
+    """
+    if not token:
+        return None
+    secrets = load_secrets()
+    try:
+        username, expires, signature = token.rsplit("|", 2)
+        expires = int(expires)
+    except ValueError:
+        return None
+    if not secrets.password_hash or expires < time.time():
+        return None
+    if not hmac.compare_digest(signature, _sign(secrets, f"{username}|{expires}")):
+        return None
+    return username
@@ -0,0 +1,85 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Desktop build of the app:
+#   pyinstaller baralhos.spec
+# Builds dist/baralhos/ (onedir): nothing is unpacked to a temporary
+# directory at launch, unlike a onefile executable, so startup only pays for
+# the imports. Compare builds with python -m benchmarks.frozen_startup.
+import os
+import subprocess
+import sys
+
+from PyInstaller.utils.hooks import collect_submodules
+
+ROOT = os.path.abspath(SPECPATH)
+
+# Only bundle the Streamlit submodules the app imports (read by
+# hook/hook-streamlit.py)
+modules_file = os.path.join(workpath, "streamlit_modules.txt")
+os.makedirs(workpath, exist_ok=True)
+subprocess.run(
+    [sys.executable, os.path.join(ROOT, "hook", "record_modules.py"), "--output", modules_file],
+    check=True,
+)
+os.environ["BARALHOS_STREAMLIT_MODULES"] = modules_file
+
+# Installed in the build environment but never imported by the app
+EXCLUDES = [
+    "langchain",
+    "langchain_core",
+    "langchain_text_splitters",
+    "langsmith",
+    "faiss",
+    "sqlalchemy",
+    "aiohttp",
+    "pydantic",
+    "streamlit.testing",
+    "streamlit.external",
+    "benchmarks",
+    "service",
+    "tkinter",
+    "matplotlib",
+    "IPython",
+    "pytest",
+    "setuptools",
+    "pip",
+]
+
+# baralhos.py is run by Streamlit from a path, and its pages are imported by
+# name, so neither is found from entrypoint.py
+HIDDEN_IMPORTS = ["baralhos", "xlsxwriter"] + collect_submodules("app_pages")
+
+a = Analysis(
+    ["entrypoint.py"],
+    pathex=[ROOT],
+    binaries=[],
+    datas=[("baralhos.py", "."), ("baralhos.png", ".")],
+    hiddenimports=HIDDEN_IMPORTS,
+    hookspath=["hook"],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=EXCLUDES,
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name="baralhos",
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=True,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    name="baralhos",
+)
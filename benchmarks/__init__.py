@@ -0,0 +1,6 @@
+# Benchmarks for the app. Run from the repository root:
+#   python -m benchmarks.startup           cold imports and first render
+#   python -m benchmarks.card_decks_bench  card_decks functions on synthetic data
+#   python -m benchmarks.compare A.json B.json
+#   python -m benchmarks.frozen_startup CMD...  launch-to-healthy time of builds
+# Synthetic databases alone can be made with python -m benchmarks.synthetic.
@@ -0,0 +1,226 @@
+"""Times every public card_decks function on synthetic databases.
+
+Each function is run once cold (right after the database file was dropped
+from the OS page cache, where the platform allows it, and with empty
+caches) and then repeatedly warm. The SQL each function runs is captured
+and reported with its EXPLAIN QUERY PLAN. Results are written as JSON, to
+be compared between runs with benchmarks.compare.
+
+Usage:
+    python -m benchmarks.card_decks_bench [--sizes 1000 10000 100000]
+        [--repeat 20] [--data-dir DIR] [--output results.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import card_decks as cd
+import deck_cache as dcache
+from benchmarks import synthetic
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+def drop_page_cache(path):
+    """Asks the OS to evict the file from its page cache (Linux only)."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+def make_image_bytes():
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    buffer = io.BytesIO()
+    Image.effect_noise((800, 600), 40).convert("RGB").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+def cases(n_decks, image_bytes):
+    """(name, function, args factory) for every public card_decks function.
+
+    Args are built per call so repeated writes do not collide.
+    """
+    counter = iter(range(10**9))
+    middle = max(1, n_decks // 2)
+    ids = [1] * 8
+    state = {}
+
+    def scalar(sql, parameters=()):
+        conn = cd.connect()
+        try:
+            row = conn.execute(sql, parameters).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def added_record():
+        name = f"Bench {next(counter)}"
+        cd.add_record("themes", name)
+        return scalar("SELECT MAX(id) FROM themes")
+
+    def current_version(deck_id):
+        return scalar("SELECT updated_at FROM decks WHERE id = ?", (deck_id,))
+
+    def image_hash():
+        if "hash" not in state:
+            state["hash"] = scalar("SELECT hash FROM deck_images LIMIT 1")
+        return state["hash"]
+
+    def image_of(deck_id):
+        if not state.get(deck_id):
+            state[deck_id] = cd.add_deck_image(deck_id, image_bytes) if image_bytes else None
+        image_id, state[deck_id] = state[deck_id], None
+        return image_id
+
+    result = [
+        ("init_db", cd.init_db, lambda: ()),
+        ("get_records", cd.get_records, lambda: ("themes",)),
+        ("add_record", cd.add_record, lambda: ("themes", f"Bench record {next(counter)}")),
+        ("delete_record", cd.delete_record, lambda: ("themes", added_record())),
+        ("get_decks", cd.get_decks, lambda: ()),
+        ("get_deck_by_id", cd.get_deck_by_id, lambda: (middle,)),
+        ("filter_decks_none", cd.filter_decks, lambda: ()),
+        ("filter_decks_type", cd.filter_decks, lambda: (1,)),
+        ("filter_decks_country_manufacturer", cd.filter_decks, lambda: (None, None, None, None, None, 2, None, 2)),
+        ("search_decks_description", cd.search_decks, lambda: (f"sintético {middle}",)),
+        ("search_decks_reference", cd.search_decks, lambda: ("Countries 2",)),
+        ("get_deck_names", cd.get_deck_names, lambda: (cd.filter_decks(1),)),
+        ("update_deck", cd.update_deck, lambda: (middle, {"description": f"Descrição {next(counter)}"}, current_version(middle))),
+        ("edit_deck", cd.edit_deck, lambda: (middle, *ids, f"Descrição {next(counter)}")),
+        ("get_deck_images", cd.get_deck_images, lambda: (middle,)),
+        ("get_image_by_hash", cd.get_image_by_hash, lambda: (image_hash(),)),
+        ("reorder_deck_images", cd.reorder_deck_images, lambda: (middle, [image_id for image_id, _, _ in reversed(cd.get_deck_images(middle))])),
+    ]
+    if image_bytes:
+        result += [
+            ("add_deck", cd.add_deck, lambda: (*ids, "Bench deck", [image_bytes])),
+            ("add_deck_image", cd.add_deck_image, lambda: (middle, image_bytes)),
+            ("delete_deck_image", cd.delete_deck_image, lambda: (middle, image_of(middle))),
+        ]
+    else:
+        result.append(("add_deck", cd.add_deck, lambda: (*ids, "Bench deck", [])))
+    return result
+
+class StatementCollector:
+    """Connection hook collecting the SQL statements run on the connection."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn):
+        conn.set_trace_callback(self.statements.append)
+
+def query_plans(path, statements):
+    """EXPLAIN QUERY PLAN of each distinct data statement."""
+    conn = sqlite3.connect(path)
+    plans = {}
+    try:
+        for statement in statements:
+            sql = statement.strip()
+            if sql in plans or not sql.split(None, 1)[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+                continue
+            try:
+                plans[sql] = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+            except sqlite3.Error as e:
+                plans[sql] = [f"error: {e}"]
+    finally:
+        conn.close()
+    return [{"sql": sql, "plan": plan} for sql, plan in plans.items()]
+
+def time_call(function, args):
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+def run_size(path, n_decks, repeat, image_bytes):
+    results = {}
+    collector = StatementCollector()
+    previous_path = cd.DB_PATH
+    cd.DB_PATH = path
+    cd.connection_hooks.append(collector)
+    try:
+        for name, function, make_args in cases(n_decks, image_bytes):
+            args = make_args()
+            dcache.clear()
+            cold_dropped = drop_page_cache(path)
+            collector.statements.clear()
+            cold = time_call(function, args)
+            statements = list(collector.statements)
+
+            warm = []
+            for _ in range(repeat):
+                args = make_args()
+                warm.append(time_call(function, args))
+            warm.sort()
+            results[name] = {
+                "cold_ms": cold,
+                "cold_page_cache_dropped": cold_dropped,
+                "warm_ms": {
+                    "median": statistics.median(warm),
+                    "min": warm[0],
+                    "p95": warm[min(len(warm) - 1, int(len(warm) * 0.95))],
+                    "max": warm[-1],
+                },
+                "queries": query_plans(path, statements),
+            }
+            print(f"  {name:<36} cold {cold:9.2f} ms   warm median {results[name]['warm_ms']['median']:9.2f} ms")
+    finally:
+        cd.connection_hooks.remove(collector)
+        cd.DB_PATH = previous_path
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="Where to create the databases (default: a temporary directory)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    image_bytes = make_image_bytes()
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "images": image_bytes is not None,
+        },
+        "sizes": {},
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = args.data_dir or temp_dir
+        os.makedirs(data_dir, exist_ok=True)
+        for n_decks in args.sizes:
+            path = os.path.join(data_dir, f"bench_{n_decks}.db")
+            print(f"{n_decks} decks")
+            start = time.perf_counter()
+            dataset = synthetic.generate(path, n_decks, seed=args.seed)
+            dataset["generate_s"] = time.perf_counter() - start
+            dataset["file_bytes"] = os.path.getsize(path)
+            report["sizes"][str(n_decks)] = {
+                "dataset": dataset,
+                "functions": run_size(path, n_decks, args.repeat, image_bytes),
+            }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compares two benchmarks.card_decks_bench result files.
+
+Usage:
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 0.1]
+
+Prints the warm median and cold times of every function and size present in
+both files, flagging changes larger than the threshold (10% by default).
+Exits with status 1 if any warm median got slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressions = 0
+    for size, candidate_size in candidate["sizes"].items():
+        if size not in baseline["sizes"]:
+            continue
+        print(f"{size} decks")
+        baseline_functions = baseline["sizes"][size]["functions"]
+        for name, result in candidate_size["functions"].items():
+            if name not in baseline_functions:
+                continue
+            before = baseline_functions[name]["warm_ms"]["median"]
+            after = result["warm_ms"]["median"]
+            ratio = after / before if before else float("inf")
+            flag = ""
+            if ratio > 1 + args.threshold:
+                flag = "  SLOWER"
+                regressions += 1
+            elif ratio < 1 - args.threshold:
+                flag = "  faster"
+            print(
+                f"  {name:<36} warm {before:9.2f} -> {after:9.2f} ms ({ratio:5.2f}x)"
+                f"   cold {baseline_functions[name]['cold_ms']:9.2f} -> {result['cold_ms']:9.2f} ms{flag}"
+            )
+
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
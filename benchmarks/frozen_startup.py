@@ -0,0 +1,88 @@
+"""Measures how long the app takes from launch until the server is healthy.
+
+Each command is started N times on a free port, in a directory with a copy
+of the database, and timed until Streamlit's health endpoint answers. Use it
+to compare desktop builds, or a build with the unfrozen app:
+
+    python -m benchmarks.frozen_startup "python entrypoint.py" dist/baralhos/baralhos
+    python -m benchmarks.frozen_startup old/baralhos.exe dist/baralhos/baralhos.exe --repeat 3
+
+The port option is appended to each command (entrypoint.py passes it on to
+Streamlit).
+"""
+import argparse
+import json
+import os
+import shlex
+import shutil
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def time_startup(command, workdir, timeout):
+    """Starts command once, returning the seconds until /_stcore/health is OK"""
+    port = free_port()
+    args = shlex.split(command) + [f"--server.port={port}", "--server.address=127.0.0.1"]
+    args = [os.path.join(ROOT, arg) if arg.endswith(".py") else arg for arg in args]
+    # For the unfrozen app, which runs baralhos.py from the working directory
+    env = dict(os.environ, PYTHONPATH=ROOT)
+
+    start = time.perf_counter()
+    process = subprocess.Popen(args, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"'{command}' exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError(f"'{command}' was not healthy after {timeout} s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("commands", nargs="+", help="Commands that start the app")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for command in args.commands:
+        # Work on a copy of the database, the app migrates it on first start
+        with tempfile.TemporaryDirectory() as workdir:
+            for file_name in ("card_decks.db", "baralhos.png", "baralhos.py"):
+                shutil.copy(os.path.join(ROOT, file_name), workdir)
+            timings = [time_startup(command, workdir, args.timeout) for _ in range(args.repeat)]
+        # The first launch also pays for a cold OS file cache
+        results[command] = {
+            "first_s": timings[0],
+            "median_s": statistics.median(timings),
+            "min_s": min(timings),
+        }
+        print(f"{command:<50} first {timings[0]:6.2f} s  median {results[command]['median_s']:6.2f} s  min {min(timings):6.2f} s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Measures cold import time of the app modules and the first render of the
+login page, each in a fresh Python process.
+
+Usage:
+    python -m benchmarks.startup [--repeat N] [--output results.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What every rerun of the single-script app used to import up front
+LEGACY_IMPORTS = ["streamlit", "pandas", "PIL.Image", "bcrypt", "github", "card_decks"]
+
+MODULES = [
+    "card_decks",
+    "deck_cache",
+    "app_pages.login",
+    "app_pages.query",
+    "app_pages.manage_decks",
+    "app_pages.edit_decks",
+    "app_pages.manage_tables",
+    "app_pages.statistics",
+]
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+{imports}
+print(time.perf_counter() - start)
+"""
+
+RENDER_SCRIPT = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({script!r}, default_timeout=60)
+at.secrets["VALID_PASSWORD"] = ""
+at.secrets["VALID_USERNAME"] = ""
+at.secrets["GITHUB_TOKEN"] = ""
+at.run()
+assert not at.exception, at.exception
+print(time.perf_counter() - start)
+"""
+
+def run_python(code, cwd):
+    """Runs code in a fresh interpreter, returning the float it prints."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+def measure(code, repeat):
+    # Work on a copy of the database, the app migrates it on first render
+    with tempfile.TemporaryDirectory() as workdir:
+        for file_name in ("card_decks.db", "baralhos.png"):
+            shutil.copy(os.path.join(ROOT, file_name), workdir)
+        timings = [run_python(code, workdir) for _ in range(repeat)]
+    return {"median_ms": statistics.median(timings) * 1000, "min_ms": min(timings) * 1000}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {"python": sys.version.split()[0], "imports": {}}
+    results["imports"]["legacy: " + ", ".join(LEGACY_IMPORTS)] = measure(
+        IMPORT_SCRIPT.format(imports="\n".join(f"import {module}" for module in LEGACY_IMPORTS)), args.repeat
+    )
+    for module in MODULES:
+        results["imports"][module] = measure(IMPORT_SCRIPT.format(imports=f"import {module}"), args.repeat)
+    results["first_render_login"] = measure(
+        RENDER_SCRIPT.format(script=os.path.join(ROOT, "baralhos.py")), args.repeat
+    )
+
+    for name, timing in results["imports"].items():
+        print(f"import {name:<60} {timing['median_ms']:8.1f} ms")
+    print(f"{'first render of the login page':<67} {results['first_render_login']['median_ms']:8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
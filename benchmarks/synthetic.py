@@ -0,0 +1,124 @@
+"""Generates synthetic card_decks databases for benchmarking.
+
+Usage:
+    python -m benchmarks.synthetic OUTPUT.db --decks 10000 [--seed 0]
+"""
+import argparse
+import base64
+import io
+import os
+import random
+import sqlite3
+
+import card_decks as cd
+
+# Reference table sizes of a large real collection, reached at 100k decks.
+# Smaller collections get proportionally fewer entries (at least the minimum).
+REFERENCE_TABLES = {
+    # table: (minimum, size at 100k decks)
+    "types": (5, 12),
+    "numbers": (10, 40),
+    "themes": (50, 1500),
+    "games": (10, 60),
+    "cities": (50, 3000),
+    "countries": (20, 150),
+    "collections": (20, 800),
+    "manufacturers": (20, 600),
+}
+
+DEFAULT_IMAGE_FRACTION = 0.2
+DEFAULT_IMAGES_PER_DECK = 2
+IMAGE_POOL_SIZE = 64
+
+def reference_table_size(table, n_decks):
+    minimum, at_100k = REFERENCE_TABLES[table]
+    return max(minimum, round(at_100k * n_decks / 100_000))
+
+def make_image_pool(rng, size=IMAGE_POOL_SIZE):
+    """Returns base64 JPEG thumbnails like the ones card_decks stores.
+
+    Uses PIL when available; otherwise random bytes of a typical thumbnail
+    size stand in for the payload.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return [base64.b64encode(rng.randbytes(rng.randint(6_000, 14_000))).decode("utf-8") for _ in range(size)]
+
+    pool = []
+    for _ in range(size):
+        # Gradients plus noise: compresses to the 4-12 KB of real deck thumbnails
+        noise = Image.effect_noise((200, 140), rng.randint(20, 80))
+        gradient = Image.linear_gradient("L").resize((200, 140))
+        image = Image.merge("RGB", (Image.blend(gradient, noise, 0.3), gradient.rotate(90), noise))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG")
+        pool.append(base64.b64encode(buffer.getvalue()).decode("utf-8"))
+    return pool
+
+def generate(path, n_decks, seed=0, image_fraction=DEFAULT_IMAGE_FRACTION, images_per_deck=DEFAULT_IMAGES_PER_DECK):
+    """Creates a database at path with n_decks decks.
+
+    The same arguments always produce the same database. image_fraction of
+    the decks get up to images_per_deck thumbnails, drawn from a small pool
+    so that identical images are shared as in a real collection.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+
+    rng = random.Random(seed)
+    previous_path = cd.DB_PATH
+    cd.DB_PATH = path
+    try:
+        cd.init_db()
+    finally:
+        cd.DB_PATH = previous_path
+
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+
+    sizes = {}
+    for table in REFERENCE_TABLES:
+        sizes[table] = reference_table_size(table, n_decks)
+        cursor.executemany(
+            f"INSERT INTO {table} (name) VALUES (?)",
+            [(f"{table.capitalize()} {i}",) for i in range(1, sizes[table] + 1)]
+        )
+
+    # Skewed choice of reference values: a few are much more common than others
+    def pick(table):
+        return min(sizes[table], int(rng.paretovariate(1.2)))
+
+    columns = ["type_id", "number_id", "theme_id", "game_id", "city_id", "country_id", "collection_id", "manufacturer_id"]
+    tables = ["types", "numbers", "themes", "games", "cities", "countries", "collections", "manufacturers"]
+    cursor.executemany(
+        f"INSERT INTO decks ({', '.join(columns)}, description) VALUES ({', '.join('?' * (len(columns) + 1))})",
+        ([pick(table) for table in tables] + [f"Baralho sintético {i}"] for i in range(1, n_decks + 1))
+    )
+
+    pool = make_image_pool(rng)
+    hashes = [cd._image_hash(data) for data in pool]
+    image_rows = []
+    for deck_id in range(1, n_decks + 1):
+        if rng.random() < image_fraction:
+            for position in range(rng.randint(1, images_per_deck)):
+                index = rng.randrange(len(pool))
+                image_rows.append((deck_id, position, hashes[index], pool[index]))
+    cursor.executemany("INSERT INTO deck_images (deck_id, position, hash, data) VALUES (?, ?, ?, ?)", image_rows)
+
+    conn.commit()
+    conn.close()
+    return {"decks": n_decks, "images": len(image_rows), "reference_tables": sizes, "seed": seed}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output")
+    parser.add_argument("--decks", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--image-fraction", type=float, default=DEFAULT_IMAGE_FRACTION)
+    parser.add_argument("--images-per-deck", type=int, default=DEFAULT_IMAGES_PER_DECK)
+    args = parser.parse_args()
+    print(generate(args.output, args.decks, args.seed, args.image_fraction, args.images_per_deck))
+
+if __name__ == "__main__":
+    main()
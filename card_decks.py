@@ -1,16 +1,159 @@
 import sqlite3
 import base64
+import hashlib
 import io
+import os
+import queue
+import threading
 
-from PIL import Image
+from util_timer import timed
 
 class DuplicateRecordError(Exception):
     pass
 
+class ConcurrentEditError(Exception):
+    pass
+
+# Incremented by every function that writes to the database, so that cached
+# reads (see deck_cache) know when they are stale
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+def _file_version():
+    # The file change counter in the database header (bytes 24-27), which
+    # SQLite increments on every commit in rollback-journal mode, plus the
+    # file's mtime and size: they change when another process (the app,
+    # service.py, a sync from GitHub) writes to the database
+    try:
+        with open(DB_PATH, "rb") as f:
+            change_counter = f.read(28)[24:]
+            stat = os.fstat(f.fileno())
+        return change_counter, stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+def data_version():
+    """Returns the current data version of the database.
+
+    Changes after every write of this process (bump_data_version) and
+    every commit to the database file by any process."""
+    return _data_version, _file_version()
+
+def bump_data_version():
+    """Marks the data as changed, invalidating cached reads."""
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+
+# Path of the SQLite database used by all the functions below
+DB_PATH = "card_decks.db"
+
+# Reference tables, each with the id and name of one dimension of the decks
+TABLES = ["types", "themes", "games", "cities", "countries", "collections", "manufacturers", "numbers"]
+
+# Functions called with every new connection, e.g. to install trace callbacks
+connection_hooks = []
+
+# Class of the connections opened by connect() (see sql_trace)
+connection_factory = sqlite3.Connection
+
+def connect():
+    """Opens a connection to the database at DB_PATH, or takes an idle one
+    from the connection pool if use_connection_pool was called."""
+    if _pool is not None:
+        return _pool.acquire()
+    conn = sqlite3.connect(DB_PATH, factory=connection_factory)
+    for hook in connection_hooks:
+        hook(conn)
+    return conn
+
+class _PooledConnectionMixin:
+    """Makes close() return the connection to its pool"""
+    pool = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+
+class ConnectionPool:
+    """Keeps up to size idle connections to DB_PATH for reuse.
+
+    Connections are shared between threads (one at a time), so they are
+    opened with check_same_thread=False.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._classes = {}
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        factory = self._classes.get(connection_factory)
+        if factory is None:
+            factory = type(f"Pooled{connection_factory.__name__}", (_PooledConnectionMixin, connection_factory), {})
+            self._classes[connection_factory] = factory
+        conn = sqlite3.connect(DB_PATH, factory=factory, check_same_thread=False)
+        for hook in connection_hooks:
+            hook(conn)
+        conn.pool = self
+        return conn
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            sqlite3.Connection.close(conn)
+            return
+        if self._idle.qsize() < self.size:
+            self._idle.put(conn)
+        else:
+            sqlite3.Connection.close(conn)
+
+    def clear(self):
+        """Closes all the idle connections"""
+        while True:
+            try:
+                sqlite3.Connection.close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+_pool = None
+
+def use_connection_pool(size=4):
+    """Makes connect() reuse up to size connections instead of opening a new
+    one each time. Pass size=0 to go back to one connection per call."""
+    global _pool
+    if _pool is not None:
+        _pool.clear()
+    _pool = ConnectionPool(size) if size else None
+
+def reset_connections():
+    """Closes the idle pooled connections, e.g. after the database file was
+    replaced."""
+    if _pool is not None:
+        _pool.clear()
+
+# New value of decks.updated_at on a change: the current time, but at least
+# one millisecond after the previous value, so that two updates within the
+# same millisecond still get different versions
+NEXT_VERSION = """max(
+    strftime('%Y-%m-%d %H:%M:%f', 'now'),
+    coalesce(strftime('%Y-%m-%d %H:%M:%f', updated_at, '+0.001 seconds'), '')
+)"""
+
 # Initialize the SQLite database
+@timed()
 def init_db():
-    conn = sqlite3.connect("card_decks.db")
+    conn = connect()
     cursor = conn.cursor()
+    changes_before = conn.total_changes
 
     # Create Types table
     cursor.execute("""
@@ -111,16 +254,123 @@ def init_db():
     )
     """)
 
+    # Triggers from before NEXT_VERSION are replaced by the ones below
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ('decks', 'deck_images') AND sql NOT LIKE ?",
+        ("%'+0.001 seconds'%",)
+    )
+    for (trigger,) in cursor.fetchall():
+        cursor.execute(f"DROP TRIGGER {trigger}")
+
+    # Keep decks.updated_at current on every update. It doubles as the row
+    # version used by edit_deck to detect concurrent edits, so it is stored
+    # with millisecond precision and always moves forward.
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS decks_updated_at
+    AFTER UPDATE ON decks
+    FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+    BEGIN
+        UPDATE decks SET updated_at = {NEXT_VERSION} WHERE id = NEW.id;
+    END
+    """)
+
+    # Create Deck images table (one row per image, in display order)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS deck_images (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        deck_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        hash TEXT NOT NULL,
+        data TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (deck_id) REFERENCES decks (id) ON DELETE CASCADE
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_deck_images_deck ON deck_images (deck_id, position)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_deck_images_hash ON deck_images (hash)")
+
+    # Changing the images of a deck is a change of the deck
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS deck_images_{event.lower()}_touch_deck
+        AFTER {event} ON deck_images
+        FOR EACH ROW
+        BEGIN
+            UPDATE decks SET updated_at = {NEXT_VERSION} WHERE id = {row}.deck_id;
+        END
+        """)
+
+    # Move images still stored comma-separated in decks.images to deck_images.
+    # The inserts fire the triggers above, so updated_at is set back to its
+    # value from before the migration, which is not a change of the deck.
+    cursor.execute("SELECT id, images, updated_at FROM decks WHERE images IS NOT NULL AND images != ''")
+    for deck_id, images, updated_at in cursor.fetchall():
+        cursor.executemany(
+            "INSERT INTO deck_images (deck_id, position, hash, data) VALUES (?, ?, ?, ?)",
+            [(deck_id, position, _image_hash(data), data) for position, data in enumerate(images.split(","))]
+        )
+        cursor.execute("UPDATE decks SET images = NULL, updated_at = ? WHERE id = ?", (updated_at, deck_id))
+
     conn.commit()
+    # Only a migration that changed rows invalidates cached reads
+    if conn.total_changes != changes_before:
+        bump_data_version()
     conn.close()
 
+# Images of a deck concatenated in order, in the comma-separated form
+# decks.images used to hold
+IMAGES_COLUMN = """(
+    SELECT group_concat(data, ',') FROM (
+        SELECT data FROM deck_images WHERE deck_images.deck_id = decks.id ORDER BY position
+    )
+)"""
+
+@timed()
+def _make_thumbnail(source):
+    """Returns a base64 encoded JPEG thumbnail of an image file path or bytes."""
+    from PIL import Image  # Only needed when images are added
+
+    if isinstance(source, bytes):
+        image = Image.open(io.BytesIO(source))
+    else:
+        image = Image.open(source)
+
+    # Create thumbnail
+    image.thumbnail((200, 200))  # Resize to max 200x200 pixels
+
+    # Save thumbnail to in-memory buffer
+    thumbnail_buffer = io.BytesIO()
+    image.convert("RGB").save(thumbnail_buffer, format="JPEG") # Save as JPEG for smaller size
+    thumbnail_bytes = thumbnail_buffer.getvalue()
+
+    # Encode to base64
+    return base64.b64encode(thumbnail_bytes).decode("utf-8")
+
+def _image_hash(data):
+    """Returns the SHA-256 hex digest of a base64 encoded image."""
+    return hashlib.sha256(base64.b64decode(data)).hexdigest()
+
+def _insert_images(cursor, deck_id, image_data_list):
+    """Appends base64 thumbnails to the images of a deck, returning their ids."""
+    cursor.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM deck_images WHERE deck_id = ?", (deck_id,))
+    start = cursor.fetchone()[0]
+    image_ids = []
+    for offset, data in enumerate(image_data_list):
+        cursor.execute(
+            "INSERT INTO deck_images (deck_id, position, hash, data) VALUES (?, ?, ?, ?)",
+            (deck_id, start + offset, _image_hash(data), data)
+        )
+        image_ids.append(cursor.lastrowid)
+    return image_ids
+
 # Helper functions to interact with the database
+@timed()
 def add_record(table, name):
     try:
-        conn = sqlite3.connect("card_decks.db")
+        conn = connect()
         cursor = conn.cursor()
 
-        allowed_tables = ["types", "themes", "games", "cities", "countries", "collections", "manufacturers", "numbers"]
+        allowed_tables = TABLES
         if table not in allowed_tables:
             raise ValueError(f"Invalid table name: {table}")
 
@@ -136,6 +386,7 @@ def add_record(table, name):
 
         cursor.execute(f"INSERT INTO {table} (name) VALUES (?)", (name,))
         conn.commit()
+        bump_data_version()
         print(f"Record '{name}' added to table '{table}' successfully.")
         return True
     except sqlite3.Error as e:
@@ -151,13 +402,14 @@ def add_record(table, name):
     finally:
         if conn:
             conn.close()
+@timed()
 def get_records(table):
     try:
-        conn = sqlite3.connect("card_decks.db")
+        conn = connect()
         cursor = conn.cursor()
 
         # Sanitize the table name
-        allowed_tables = ["types", "themes", "games", "cities", "countries", "collections", "manufacturers", "numbers"]
+        allowed_tables = TABLES
         if table not in allowed_tables:
             raise ValueError(f"Invalid table name: {table}")
 
@@ -174,19 +426,21 @@ def get_records(table):
         if conn:
             conn.close()
 
+@timed()
 def delete_record(table, record_id):
     try:
-        conn = sqlite3.connect("card_decks.db")
+        conn = connect()
         cursor = conn.cursor()
 
         # Sanitize the table name
-        allowed_tables = ["types", "themes", "games", "cities", "countries", "collections", "manufacturers", "numbers"]
+        allowed_tables = TABLES
         if table not in allowed_tables:
             raise ValueError(f"Invalid table name: {table}")
 
         # Parameterized query for record_id (already correctly implemented)
         cursor.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
         conn.commit()
+        bump_data_version()
         print(f"Record with ID '{record_id}' deleted from table '{table}' successfully.")
         return True # Return true on success
     except sqlite3.Error as e:
@@ -200,31 +454,16 @@ def delete_record(table, record_id):
         if conn:
             conn.close()
 
+@timed()
 def add_deck(type_id, number_id, theme_id, game_id, city_id, country_id, collection_id, manufacturer_id, description, image_paths):
     try:
-        conn = sqlite3.connect("card_decks.db")
+        conn = connect()
         cursor = conn.cursor()
 
         image_data_list = []
         for path in image_paths:
             try:
-                if isinstance(path, bytes):
-                    image = Image.open(io.BytesIO(path))
-                else:
-                    image = Image.open(path)
-
-                # Create thumbnail
-                image.thumbnail((200, 200))  # Resize to max 200x200 pixels
-                
-                # Save thumbnail to in-memory buffer
-                thumbnail_buffer = io.BytesIO()
-                image.save(thumbnail_buffer, format="JPEG") # Save as JPEG for smaller size
-                thumbnail_bytes = thumbnail_buffer.getvalue()
-
-                # Encode to base64
-                thumbnail_base64 = base64.b64encode(thumbnail_bytes).decode("utf-8")
-
-                image_data_list.append(thumbnail_base64)
+                image_data_list.append(_make_thumbnail(path))
             except FileNotFoundError:
                 print(f"Error: Image file not found: {path}")
                 return False
@@ -232,18 +471,19 @@ def add_deck(type_id, number_id, theme_id, game_id, city_id, country_id, collect
                 print(f"Error processing image: {e}")
                 return False
 
-        images_string = ",".join(image_data_list)
-
         cursor.execute(
             """
-            INSERT INTO decks (type_id, number_id, theme_id, game_id, city_id, country_id, collection_id, manufacturer_id, description, images)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO decks (type_id, number_id, theme_id, game_id, city_id, country_id, collection_id, manufacturer_id, description)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (type_id, number_id, theme_id, game_id, city_id, country_id, collection_id, manufacturer_id, description, images_string)
+            (type_id, number_id, theme_id, game_id, city_id, country_id, collection_id, manufacturer_id, description)
         )
+        deck_id = cursor.lastrowid
+        _insert_images(cursor, deck_id, image_data_list)
         conn.commit()
+        bump_data_version()
         print("Deck added successfully")
-        return True
+        return deck_id
     except sqlite3.Error as e:
         print(f"Database error: {e}")
         conn.rollback()
@@ -252,12 +492,15 @@ def add_deck(type_id, number_id, theme_id, game_id, city_id, country_id, collect
         if conn:
             conn.close()
 
-def get_decks():
-    conn = sqlite3.connect("card_decks.db")
+@timed()
+def get_decks(with_images=True):
+    """Returns all the decks. With with_images=False the images column is
+    None, which is much cheaper for large lists."""
+    conn = connect()
     cursor = conn.cursor()
     cursor.execute(
-        """
-        SELECT decks.id, types.name, numbers.name, themes.name, games.name, cities.name, countries.name, collections.name, manufacturers.name, decks.description, decks.images
+        f"""
+        SELECT decks.id, types.name, numbers.name, themes.name, games.name, cities.name, countries.name, collections.name, manufacturers.name, decks.description, {IMAGES_COLUMN if with_images else "NULL"}
         FROM decks
         JOIN types ON decks.type_id = types.id
         JOIN numbers ON decks.number_id = numbers.id
@@ -273,6 +516,7 @@ def get_decks():
     conn.close()
     return decks
 
+@timed()
 def get_deck_by_id(deck_id):
     try:
         # conn = sqlite3.connect('card_decks.db')
@@ -282,10 +526,10 @@ def get_deck_by_id(deck_id):
         # conn.close()
         # return deck
 
-        conn = sqlite3.connect('card_decks.db')
+        conn = connect()
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT decks.id, types.name, numbers.name, themes.name, games.name, cities.name, countries.name, collections.name, manufacturers.name, decks.description, decks.images
+        cursor.execute(f"""
+            SELECT decks.id, types.name, numbers.name, themes.name, games.name, cities.name, countries.name, collections.name, manufacturers.name, decks.description, {IMAGES_COLUMN}, decks.updated_at
             FROM decks
             JOIN types ON decks.type_id = types.id
             JOIN numbers ON decks.number_id = numbers.id
@@ -304,12 +548,15 @@ def get_deck_by_id(deck_id):
         print(f"Database error: {e}")
         return None
 
-def filter_decks(type_id=None, number_id=None, theme_id=None, game_id=None, city_id=None, country_id=None, collection_id=None, manufacturer_id=None):
-    conn = sqlite3.connect("card_decks.db")
+@timed()
+def filter_decks(type_id=None, number_id=None, theme_id=None, game_id=None, city_id=None, country_id=None, collection_id=None, manufacturer_id=None, with_images=True):
+    """Returns the decks matching all the given ids. With with_images=False
+    the images column is None, which is much cheaper for large lists."""
+    conn = connect()
     cursor = conn.cursor()
 
-    query = """
-        SELECT decks.id, types.name, numbers.name, themes.name, games.name, cities.name, countries.name, collections.name, manufacturers.name, decks.description, decks.images
+    query = f"""
+        SELECT decks.id, types.name, numbers.name, themes.name, games.name, cities.name, countries.name, collections.name, manufacturers.name, decks.description, {IMAGES_COLUMN if with_images else "NULL"}
         FROM decks
         JOIN types ON decks.type_id = types.id
         JOIN numbers ON decks.number_id = numbers.id
@@ -356,6 +603,37 @@ def filter_decks(type_id=None, number_id=None, theme_id=None, game_id=None, city
     conn.close()
     return decks
 
+@timed()
+def search_decks(text, with_images=False):
+    """Returns the decks whose description or any reference name contains
+    text (case-insensitive for ASCII letters)."""
+    try:
+        conn = connect()
+        cursor = conn.cursor()
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        searched = ["decks.description", "types.name", "numbers.name", "themes.name", "games.name", "cities.name", "countries.name", "collections.name", "manufacturers.name"]
+        where = " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in searched)
+        cursor.execute(f"""
+            SELECT decks.id, types.name, numbers.name, themes.name, games.name, cities.name, countries.name, collections.name, manufacturers.name, decks.description, {IMAGES_COLUMN if with_images else "NULL"}
+            FROM decks
+            JOIN types ON decks.type_id = types.id
+            JOIN numbers ON decks.number_id = numbers.id
+            JOIN themes ON decks.theme_id = themes.id
+            JOIN games ON decks.game_id = games.id
+            JOIN cities ON decks.city_id = cities.id
+            JOIN countries ON decks.country_id = countries.id
+            JOIN collections ON decks.collection_id = collections.id
+            JOIN manufacturers ON decks.manufacturer_id = manufacturers.id
+            WHERE {where}
+        """, [pattern] * len(searched))
+        decks = cursor.fetchall()
+        conn.close()
+        return decks
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return []
+
+@timed()
 def get_deck_names(filtered_decks):
     deck_names = []
     for deck in filtered_decks:
@@ -363,17 +641,294 @@ def get_deck_names(filtered_decks):
         deck_names.append(deck_name)
     return deck_names
 
-def edit_deck(deck_id, type_id, number_id, theme_id, game_id, city_id, country_id, collection_id, manufacturer_id, description, images):
+# Columns of decks that can be changed with update_deck. "images" is the
+# ordered list of base64 thumbnails of the deck, stored in deck_images.
+DECK_COLUMNS = ["type_id", "number_id", "theme_id", "game_id", "city_id", "country_id", "collection_id", "manufacturer_id", "description", "images"]
+
+@timed()
+def update_deck(deck_id, changes, expected_updated_at=None):
+    """Updates only the columns of a deck whose value actually changed.
+
+    Args:
+        deck_id (int): Id of the deck to update.
+        changes (dict): New values by column name (see DECK_COLUMNS). Columns
+            left out, and columns whose value is unchanged, are not written.
+        expected_updated_at (str, optional): The updated_at value returned by
+            get_deck_by_id when the deck was loaded. If given, the update only
+            applies if the deck has not been changed since.
+
+    Returns:
+        str: The updated_at value of the deck after the update (the current
+            one if nothing changed), or None on database error.
+    Raises:
+        ValueError: If changes contains an unknown column.
+        ConcurrentEditError: If the deck was changed or deleted by someone else.
+    """
+    invalid_columns = [column for column in changes if column not in DECK_COLUMNS]
+    if invalid_columns:
+        raise ValueError(f"Invalid deck columns: {invalid_columns}")
+
+    conn = None
     try:
-        conn = sqlite3.connect('card_decks.db')
+        conn = connect()
         cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE decks SET
-            type_id = ?, number_id = ?, theme_id = ?, game_id = ?, city_id = ?,
-            country_id = ?, collection_id = ?, manufacturer_id = ?, description = ?, images = ?
-            WHERE id = ?
-        """, (type_id, number_id, theme_id, game_id, city_id, country_id, collection_id, manufacturer_id, description, ",".join([image.decode('latin-1') if isinstance(image, bytes) else image for image in images]), deck_id))
+        cursor.execute("BEGIN IMMEDIATE")
+
+        columns = [column for column in changes if column != "images"]
+        cursor.execute(f"SELECT {', '.join(['updated_at'] + columns)} FROM decks WHERE id = ?", (deck_id,))
+        row = cursor.fetchone()
+        if row is None or (expected_updated_at is not None and row[0] != expected_updated_at):
+            conn.rollback()
+            raise ConcurrentEditError(f"Deck {deck_id} was changed or deleted by another session.")
+
+        changed = {column: changes[column] for column, current in zip(columns, row[1:]) if changes[column] != current}
+        images_changed = False
+        if "images" in changes:
+            cursor.execute("SELECT data FROM deck_images WHERE deck_id = ? ORDER BY position", (deck_id,))
+            images_changed = [image[0] for image in cursor.fetchall()] != list(changes["images"])
+        if not changed and not images_changed:
+            conn.rollback()
+            return row[0]
+
+        if changed:
+            assignments = ", ".join(f"{column} = ?" for column in changed)
+            cursor.execute(
+                f"UPDATE decks SET {assignments} WHERE id = ? AND updated_at = ?",
+                list(changed.values()) + [deck_id, row[0]]
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()
+                raise ConcurrentEditError(f"Deck {deck_id} was changed or deleted by another session.")
+        if images_changed:
+            cursor.execute("DELETE FROM deck_images WHERE deck_id = ?", (deck_id,))
+            _insert_images(cursor, deck_id, changes["images"])
+        cursor.execute("SELECT updated_at FROM decks WHERE id = ?", (deck_id,))
+        updated_at = cursor.fetchone()[0]
         conn.commit()
+        bump_data_version()
+        return updated_at
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        if conn:
+            conn.rollback()
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+@timed()
+def edit_deck(deck_id, type_id, number_id, theme_id, game_id, city_id, country_id, collection_id, manufacturer_id, description, images=None, expected_updated_at=None):
+    """Updates a deck, writing only the columns that changed.
+
+    images replaces all the images of the deck: each item is either image
+    file bytes, which are made into a thumbnail, or an already stored base64
+    thumbnail. Pass images=None to keep the current images untouched. If
+    expected_updated_at is given (the updated_at value returned by
+    get_deck_by_id when the deck was loaded), the update only applies if the
+    deck has not been changed since; otherwise ConcurrentEditError is raised.
+
+    Returns:
+        str: The new updated_at value of the deck, or None on error.
+    Raises:
+        ConcurrentEditError: If the deck was changed by someone else.
+    """
+    changes = {
+        "type_id": type_id,
+        "number_id": number_id,
+        "theme_id": theme_id,
+        "game_id": game_id,
+        "city_id": city_id,
+        "country_id": country_id,
+        "collection_id": collection_id,
+        "manufacturer_id": manufacturer_id,
+        "description": description,
+    }
+    if images is not None:
+        try:
+            changes["images"] = [_make_thumbnail(image) if isinstance(image, bytes) else image for image in images]
+        except Exception as e:
+            print(f"Error processing image: {e}")
+            return None
+    return update_deck(deck_id, changes, expected_updated_at)
+
+@timed()
+def get_deck_images(deck_id):
+    """Returns the images of a deck in display order.
+
+    Returns:
+        list: (id, hash, data) tuples, data being the base64 thumbnail.
+    """
+    try:
+        conn = connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, hash, data FROM deck_images WHERE deck_id = ? ORDER BY position", (deck_id,))
+        images = cursor.fetchall()
+        conn.close()
+        return images
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return []
+
+@timed()
+def get_image_by_hash(image_hash):
+    """Returns the base64 thumbnail with the given SHA-256 hash, or None."""
+    try:
+        conn = connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT data FROM deck_images WHERE hash = ? LIMIT 1", (image_hash,))
+        row = cursor.fetchone()
         conn.close()
+        return row[0] if row else None
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return None
+
+def _lock_deck(conn, cursor, deck_id, expected_updated_at=None):
+    # Starts a write transaction and checks the deck exists and, if
+    # expected_updated_at is given, that it is unchanged. Returns False
+    # (after rolling back) if the deck does not exist.
+    cursor.execute("BEGIN IMMEDIATE")
+    cursor.execute("SELECT updated_at FROM decks WHERE id = ?", (deck_id,))
+    row = cursor.fetchone()
+    if expected_updated_at is not None and (row is None or row[0] != expected_updated_at):
+        conn.rollback()
+        raise ConcurrentEditError(f"Deck {deck_id} was changed or deleted by another session.")
+    if row is None:
+        conn.rollback()
+        return False
+    return True
+
+@timed()
+def add_deck_image(deck_id, image, expected_updated_at=None):
+    """Appends one image (file path or bytes) to the end of a deck's images.
+
+    If expected_updated_at is given (the updated_at value returned by
+    get_deck_by_id when the deck was loaded), the image is only added if the
+    deck has not been changed since.
+
+    Returns:
+        int: Id of the new image, or None if the deck does not exist or on
+            error.
+    Raises:
+        ConcurrentEditError: If the deck was changed or deleted by someone else.
+    """
+    conn = None
+    try:
+        data = _make_thumbnail(image)
+    except FileNotFoundError:
+        print(f"Error: Image file not found: {image}")
+        return None
+    except Exception as e:
+        print(f"Error processing image: {e}")
+        return None
+
+    try:
+        conn = connect()
+        cursor = conn.cursor()
+        # Foreign keys are not enforced, so check the deck in the same
+        # transaction to never leave an orphan image
+        if not _lock_deck(conn, cursor, deck_id, expected_updated_at):
+            print(f"Error: Deck {deck_id} not found")
+            return None
+        image_id = _insert_images(cursor, deck_id, [data])[0]
+        conn.commit()
+        bump_data_version()
+        return image_id
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        if conn:
+            conn.rollback()
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+@timed()
+def delete_deck_image(deck_id, image_id=None, image_hash=None, expected_updated_at=None):
+    """Deletes an image of a deck, given its id or its hash.
+
+    If expected_updated_at is given, the image is only deleted if the deck
+    has not been changed since (see add_deck_image).
+
+    Returns:
+        bool: True if an image was deleted, False otherwise.
+    Raises:
+        ConcurrentEditError: If the deck was changed or deleted by someone else.
+    """
+    if (image_id is None) == (image_hash is None):
+        raise ValueError("Give exactly one of image_id or image_hash")
+
+    conn = None
+    try:
+        conn = connect()
+        cursor = conn.cursor()
+        if not _lock_deck(conn, cursor, deck_id, expected_updated_at):
+            return False
+        if image_id is not None:
+            cursor.execute("DELETE FROM deck_images WHERE deck_id = ? AND id = ?", (deck_id, image_id))
+        else:
+            cursor.execute("DELETE FROM deck_images WHERE deck_id = ? AND hash = ?", (deck_id, image_hash))
+        deleted = cursor.rowcount > 0
+        conn.commit()
+        bump_data_version()
+        return deleted
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+@timed()
+def reorder_deck_images(deck_id, order, expected_updated_at=None):
+    """Sets the display order of a deck's images.
+
+    Args:
+        deck_id (int): Id of the deck.
+        order (list): Image ids (int) or hashes (str) in the new order. Images
+            left out keep their relative order after the listed ones.
+        expected_updated_at (str, optional): If given, the images are only
+            reordered if the deck has not been changed since (see
+            add_deck_image).
+
+    Returns:
+        bool: True on success, False otherwise.
+    Raises:
+        ConcurrentEditError: If the deck was changed or deleted by someone else.
+    """
+    conn = None
+    try:
+        conn = connect()
+        cursor = conn.cursor()
+        if not _lock_deck(conn, cursor, deck_id, expected_updated_at):
+            return False
+        cursor.execute("SELECT id, hash, position FROM deck_images WHERE deck_id = ? ORDER BY position", (deck_id,))
+        images = cursor.fetchall()
+
+        ordered_ids = []
+        for key in order:
+            for image_id, image_hash, _ in images:
+                if key in (image_id, image_hash) and image_id not in ordered_ids:
+                    ordered_ids.append(image_id)
+                    break
+        ordered_ids += [image[0] for image in images if image[0] not in ordered_ids]
+
+        # Only write the rows whose position actually changes
+        current_positions = {image[0]: image[2] for image in images}
+        cursor.executemany(
+            "UPDATE deck_images SET position = ? WHERE id = ?",
+            [(position, image_id) for position, image_id in enumerate(ordered_ids) if current_positions[image_id] != position]
+        )
+        conn.commit()
+        bump_data_version()
+        return True
     except sqlite3.Error as e:
         print(f"Database error: {e}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
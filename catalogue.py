@@ -0,0 +1,273 @@
+"""PDF catalogue of decks, with their thumbnails and details.
+
+Pages are rendered in a process pool: each worker reads the images of its
+decks itself, writes them to a temporary file and returns the page's
+drawing operators. The main process writes the PDF object by object as the
+pages arrive, copying each image from its worker's file straight to the
+output, once per distinct image (by content hash) however many decks show
+it. Only the object offsets and the hashes already written stay in memory,
+so the catalogue can have any number of decks. The thumbnails are embedded
+as they are stored (JPEG), without decoding them.
+
+Usage:
+    python catalogue.py catalogue.pdf [--country ID] [--manufacturer ID] ...
+"""
+import argparse
+import base64
+import io
+import multiprocessing
+import os
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import card_decks as cd
+from util_timer import timed
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 36
+HEADER_HEIGHT = 40
+COLUMNS, ROWS = 2, 3
+DECKS_PER_PAGE = COLUMNS * ROWS
+IMAGES_PER_DECK = 2
+IMAGE_HEIGHT = 110
+FONT_SIZE = 8
+LINE_HEIGHT = 10.5
+
+# Labels of the columns of filter_decks() rows, as on the Listagens page
+FIELDS = ["Tipo", "Número de Cartas", "Tema", "Jogo", "Cidade", "País", "Coleção", "Fabricante", "Descrição"]
+
+def _text(x, y, text, font="/F1", size=FONT_SIZE, max_width=None):
+    """PDF operators that draw one line of text, cut to max_width points"""
+    if max_width:
+        # Helvetica is about half an em wide per character on average
+        max_chars = int(max_width / (size * 0.5))
+        if len(text) > max_chars:
+            text = text[:max_chars - 1] + "…"
+    encoded = text.encode("cp1252", errors="replace")
+    encoded = encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+    return b"BT %s %d Tf %.1f %.1f Td (%s) Tj ET\n" % (font.encode(), size, x, y, encoded)
+
+def _jpeg(image_data):
+    """Returns a base64 thumbnail as JPEG bytes, with its size and PDF color space"""
+    from PIL import Image
+
+    data = base64.b64decode(image_data)
+    image = Image.open(io.BytesIO(data))  # Only reads the header
+    if image.format != "JPEG" or image.mode not in ("RGB", "L"):
+        buffer = io.BytesIO()
+        image = image.convert("RGB")
+        image.save(buffer, format="JPEG")
+        data = buffer.getvalue()
+    return data, image.size, "/DeviceRGB" if image.mode == "RGB" else "/DeviceGray"
+
+def render_page(db_path, title, page_number, page_count, decks, images_path):
+    """Renders one catalogue page. Runs in a worker process.
+
+    Args:
+        db_path (str): The database, read for the images of the decks.
+        title (str): Title printed at the top of the page.
+        page_number (int): Number of this page, from 1.
+        page_count (int): Number of pages of the catalogue.
+        decks (list): filter_decks() rows, at most DECKS_PER_PAGE.
+        images_path (str): File to write the JPEG data of the page's images to.
+
+    Returns:
+        tuple: The page's drawing operators, and a (name, hash, width,
+        height, color space, length) tuple per image, in the order their
+        data was written to images_path.
+    """
+    cd.DB_PATH = db_path
+    images = {}
+    content = [
+        _text(MARGIN, PAGE_HEIGHT - MARGIN - 12, title, font="/F2", size=14, max_width=PAGE_WIDTH - 2 * MARGIN - 80),
+        _text(PAGE_WIDTH - MARGIN - 70, PAGE_HEIGHT - MARGIN - 12, f"Página {page_number} de {page_count}"),
+    ]
+
+    cell_width = (PAGE_WIDTH - 2 * MARGIN) / COLUMNS
+    cell_height = (PAGE_HEIGHT - 2 * MARGIN - HEADER_HEIGHT) / ROWS
+    with open(images_path, "wb") as images_file:
+        for i, deck in enumerate(decks):
+            x = MARGIN + (i % COLUMNS) * cell_width
+            top = PAGE_HEIGHT - MARGIN - HEADER_HEIGHT - (i // COLUMNS) * cell_height
+            text_width = cell_width - 12
+
+            y = top - 12
+            content.append(_text(x, y, f"{deck[0]}. {deck[1]}", font="/F2", size=10, max_width=text_width))
+
+            # Thumbnails side by side, scaled to fit their share of the width
+            image_x = x
+            image_width = text_width / IMAGES_PER_DECK - 6
+            for _, image_hash, image_data in cd.get_deck_images(deck[0])[:IMAGES_PER_DECK]:
+                name = f"/Im{image_hash[:16]}"
+                if name not in images:
+                    data, size, color_space = _jpeg(image_data)
+                    images_file.write(data)
+                    images[name] = (name, image_hash, size[0], size[1], color_space, len(data))
+                width, height = images[name][2:4]
+                scale = min(image_width / width, IMAGE_HEIGHT / height)
+                width, height = width * scale, height * scale
+                content.append(b"q %.2f 0 0 %.2f %.2f %.2f cm %s Do Q\n" % (width, height, image_x, y - 6 - height, name.encode()))
+                image_x += width + 6
+
+            y -= 6 + IMAGE_HEIGHT + LINE_HEIGHT
+            for label, value in zip(FIELDS, deck[1:10]):
+                content.append(_text(x, y, f"{label}: {value or ''}", max_width=text_width))
+                y -= LINE_HEIGHT
+
+    return b"".join(content), list(images.values())
+
+def _render_page(task):
+    return render_page(*task)
+
+class PdfStreamWriter:
+    """Writes a PDF to a file one object at a time.
+
+    Objects are serialized with pypdf's generic objects and written as soon
+    as they are added; only their offsets are kept for the cross-reference
+    table written by close().
+    """
+    def __init__(self, f):
+        self.f = f
+        self.offsets = [None]  # By object number, from 1
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def reserve(self):
+        """Returns the number of an object to be written later"""
+        self.offsets.append(None)
+        return len(self.offsets) - 1
+
+    def ref(self, number):
+        from pypdf.generic import IndirectObject
+
+        return IndirectObject(number, 0, None)
+
+    def write(self, obj, stream_data=None, number=None):
+        """Writes obj (a pypdf DictionaryObject when stream_data is given),
+        returning its object number"""
+        from pypdf.generic import NameObject, NumberObject
+
+        number = number or self.reserve()
+        self.offsets[number] = self.f.tell()
+        self.f.write(b"%d 0 obj\n" % number)
+        if stream_data is not None:
+            obj[NameObject("/Length")] = NumberObject(len(stream_data))
+        obj.write_to_stream(self.f)
+        if stream_data is not None:
+            self.f.write(b"\nstream\n")
+            self.f.write(stream_data)
+            self.f.write(b"\nendstream")
+        self.f.write(b"\nendobj\n")
+        return number
+
+    def close(self, root, info):
+        """Writes the cross-reference table and the trailer"""
+        xref = self.f.tell()
+        self.f.write(b"xref\n0 %d\n0000000000 65535 f \n" % len(self.offsets))
+        for offset in self.offsets[1:]:
+            self.f.write(b"%010d 00000 n \n" % offset)
+        self.f.write(b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(self.offsets), root, info, xref))
+
+def _font(name):
+    from pypdf.generic import DictionaryObject, NameObject
+
+    return DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject(name),
+        NameObject("/Encoding"): NameObject("/WinAnsiEncoding"),
+    })
+
+@timed()
+def build_catalogue(decks, output_path, title="Catálogo de Baralhos", workers=None):
+    """Writes a PDF catalogue of decks.
+
+    Args:
+        decks (list): filter_decks() rows (with_images=False is enough).
+        output_path (str): The PDF file to write.
+        title (str): Title printed at the top of every page.
+        workers (int, optional): Number of worker processes. Defaults to the
+            number of CPUs.
+
+    Returns:
+        int: The number of pages.
+    """
+    from pypdf.generic import ArrayObject, DictionaryObject, NameObject, NumberObject, TextStringObject
+
+    pages = [decks[i:i + DECKS_PER_PAGE] for i in range(0, len(decks), DECKS_PER_PAGE)] or [[]]
+    db_path = os.path.abspath(cd.DB_PATH)
+
+    with tempfile.TemporaryDirectory() as page_dir, open(output_path, "wb") as f:
+        pdf = PdfStreamWriter(f)
+        pages_number = pdf.reserve()
+        fonts = DictionaryObject({
+            NameObject("/F1"): pdf.ref(pdf.write(_font("/Helvetica"))),
+            NameObject("/F2"): pdf.ref(pdf.write(_font("/Helvetica-Bold"))),
+        })
+        image_numbers = {}  # Image hash -> object number, each image is written once
+        page_numbers = []
+
+        tasks = [
+            (db_path, title, number, len(pages), page_decks, os.path.join(page_dir, f"{number:06d}.jpg"))
+            for number, page_decks in enumerate(pages, start=1)
+        ]
+        # spawn: the workers must not inherit the pooled connections
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            # map() yields the pages in order, as soon as each one is ready
+            for task, (content, images) in zip(tasks, executor.map(_render_page, tasks)):
+                images_path = task[-1]
+                resources = DictionaryObject()
+                with open(images_path, "rb") as images_file:
+                    for name, image_hash, width, height, color_space, length in images:
+                        data = images_file.read(length)
+                        if image_hash not in image_numbers:
+                            image_numbers[image_hash] = pdf.write(DictionaryObject({
+                                NameObject("/Type"): NameObject("/XObject"),
+                                NameObject("/Subtype"): NameObject("/Image"),
+                                NameObject("/Width"): NumberObject(width),
+                                NameObject("/Height"): NumberObject(height),
+                                NameObject("/ColorSpace"): NameObject(color_space),
+                                NameObject("/BitsPerComponent"): NumberObject(8),
+                                NameObject("/Filter"): NameObject("/DCTDecode"),
+                            }), data)
+                        resources[NameObject(name)] = pdf.ref(image_numbers[image_hash])
+                os.remove(images_path)
+
+                contents = pdf.write(DictionaryObject({NameObject("/Filter"): NameObject("/FlateDecode")}), zlib.compress(content))
+                page_numbers.append(pdf.write(DictionaryObject({
+                    NameObject("/Type"): NameObject("/Page"),
+                    NameObject("/Parent"): pdf.ref(pages_number),
+                    NameObject("/MediaBox"): ArrayObject([NumberObject(0), NumberObject(0), NumberObject(PAGE_WIDTH), NumberObject(PAGE_HEIGHT)]),
+                    NameObject("/Resources"): DictionaryObject({NameObject("/Font"): fonts, NameObject("/XObject"): resources}),
+                    NameObject("/Contents"): pdf.ref(contents),
+                })))
+
+        pdf.write(DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject([pdf.ref(number) for number in page_numbers]),
+            NameObject("/Count"): NumberObject(len(page_numbers)),
+        }), number=pages_number)
+        root = pdf.write(DictionaryObject({NameObject("/Type"): NameObject("/Catalog"), NameObject("/Pages"): pdf.ref(pages_number)}))
+        info = pdf.write(DictionaryObject({NameObject("/Title"): TextStringObject(title)}))
+        pdf.close(root, info)
+    return len(pages)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="The PDF file to write")
+    parser.add_argument("--db", help="The database (default: card_decks.db)")
+    parser.add_argument("--title", default="Catálogo de Baralhos")
+    parser.add_argument("--workers", type=int)
+    for option in ("type", "number", "theme", "game", "city", "country", "collection", "manufacturer"):
+        parser.add_argument(f"--{option}", type=int, metavar="ID", help=f"Only decks with this {option}_id")
+    args = parser.parse_args()
+
+    if args.db:
+        cd.DB_PATH = args.db
+    decks = cd.filter_decks(args.type, args.number, args.theme, args.game, args.city, args.country,
+                            args.collection, args.manufacturer, with_images=False)
+    pages = build_catalogue(decks, args.output, title=args.title, workers=args.workers)
+    print(f"{len(decks)} decks in {pages} pages written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Maintenance of card_decks.db: integrity check, statistics and compaction.
+
+Deletes and image rewrites leave free pages in the file, and the query
+planner only knows the tables' sizes after ANALYZE. run_maintenance() checks
+the integrity of the database, refreshes the statistics (ANALYZE, PRAGMA
+optimize) and gives the free pages back (PRAGMA incremental_vacuum, or a
+full VACUUM that also switches the file to incremental auto-vacuum), and
+reports the size before and after. snapshot() writes a compacted copy with
+VACUUM INTO, e.g. to upload to GitHub.
+
+Usage:
+    python db_maintenance.py [--no-vacuum] [--snapshot PATH] [--db PATH]
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+import card_decks as cd
+from util_timer import metrics, timed
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+def database_stats(conn):
+    """Returns the page size, page count and free page count of a database"""
+    return {
+        "page_size": conn.execute("PRAGMA page_size").fetchone()[0],
+        "pages": conn.execute("PRAGMA page_count").fetchone()[0],
+        "free_pages": conn.execute("PRAGMA freelist_count").fetchone()[0],
+    }
+
+@timed()
+def integrity_check(conn):
+    """Runs PRAGMA integrity_check, returning the problems found (empty if none)"""
+    problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    return [] if problems == ["ok"] else problems
+
+@timed()
+def analyze(conn):
+    """Refreshes the statistics used by the query planner"""
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    conn.commit()
+
+@timed()
+def vacuum(conn):
+    """Gives the free pages of the database back to the file system.
+
+    Uses PRAGMA incremental_vacuum when the database has incremental
+    auto-vacuum. Otherwise runs a full VACUUM, which also turns it on so
+    the next runs are incremental.
+
+    Returns:
+        str: "incremental" or "full".
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        # executescript steps the pragma until it is done (one page per step)
+        conn.executescript("PRAGMA incremental_vacuum")
+        conn.commit()
+        return "incremental"
+    conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+    conn.execute("VACUUM")
+    return "full"
+
+@timed()
+def snapshot(path, db_path=None):
+    """Writes a compacted copy of the database with VACUUM INTO.
+
+    Args:
+        path (str): The file to write. It is replaced if it exists.
+        db_path (str, optional): The database to copy. Defaults to card_decks.DB_PATH.
+
+    Returns:
+        int: The size of the snapshot in bytes.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(db_path or cd.DB_PATH)
+    try:
+        conn.execute("VACUUM INTO ?", (path,))
+    finally:
+        conn.close()
+    return os.path.getsize(path)
+
+def run_maintenance(db_path=None, do_vacuum=True, snapshot_path=None, logger=print):
+    """Checks, analyzes and compacts the database.
+
+    Nothing is changed if the integrity check finds problems.
+
+    Args:
+        db_path (str, optional): The database. Defaults to card_decks.DB_PATH.
+        do_vacuum (bool): Whether to give the free pages back.
+        snapshot_path (str, optional): Also write a compacted copy here.
+        logger (callable): Receives the report lines.
+
+    Returns:
+        dict: The report, with the sizes before and after in bytes.
+    """
+    db_path = db_path or cd.DB_PATH
+    start = time.perf_counter()
+    report = {"size_before": os.path.getsize(db_path)}
+
+    # Its own connection, outside the connection pool: VACUUM needs a
+    # connection with no open transaction
+    conn = sqlite3.connect(db_path)
+    try:
+        report["before"] = database_stats(conn)
+        report["problems"] = integrity_check(conn)
+        if report["problems"]:
+            for problem in report["problems"]:
+                logger(f"Integrity check: {problem}")
+        else:
+            analyze(conn)
+            if do_vacuum:
+                report["vacuum"] = vacuum(conn)
+        report["after"] = database_stats(conn)
+    finally:
+        conn.close()
+    report["size_after"] = os.path.getsize(db_path)
+
+    if snapshot_path and not report["problems"]:
+        report["snapshot_size"] = snapshot(snapshot_path, db_path)
+
+    report["seconds"] = time.perf_counter() - start
+    metrics.observe("db_maintenance.run", report["seconds"])
+    logger(
+        f"Maintenance of {db_path}: {'integrity problems found' if report['problems'] else 'integrity ok'}, "
+        f"{report['size_before'] / 1024:.0f} KB -> {report['size_after'] / 1024:.0f} KB "
+        f"({report['before']['free_pages']} -> {report['after']['free_pages']} free pages)"
+        + (f", snapshot {report['snapshot_size'] / 1024:.0f} KB" if "snapshot_size" in report else "")
+        + f" in {report['seconds'] * 1000:.0f} ms"
+    )
+    return report
+
+def start_scheduler(interval_hours=24, logger=print):
+    """Runs run_maintenance() every interval_hours in a daemon thread.
+
+    Returns:
+        threading.Event: Set it to stop the scheduler.
+    """
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval_hours * 60 * 60):
+            try:
+                run_maintenance(logger=logger)
+            except sqlite3.Error as e:
+                logger(f"Maintenance failed: {e}")
+
+    threading.Thread(target=loop, name="db-maintenance", daemon=True).start()
+    return stop
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="The database (default: card_decks.db)")
+    parser.add_argument("--no-vacuum", action="store_true", help="Only check and analyze")
+    parser.add_argument("--snapshot", help="Also write a compacted copy with VACUUM INTO")
+    args = parser.parse_args()
+
+    report = run_maintenance(args.db, do_vacuum=not args.no_vacuum, snapshot_path=args.snapshot)
+    if report["problems"]:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+
+import card_decks as cd
+
+# Cached versions of the card_decks reads.
+#
+# Streamlit reruns the whole script on every widget interaction, so the same
+# reads are repeated over and over with unchanged data. Results are kept in
+# process memory, keyed by function and arguments, and dropped as soon as
+# card_decks.data_version() changes (every write function bumps it, and it
+# follows commits to the database file by other processes too). Unlike
+# st.cache_data, results are not pickled on every hit, which matters for rows
+# that carry images, and the cache also works outside Streamlit.
+#
+# Cached results are shared between sessions: do not modify them.
+
+MAX_ENTRIES = 256
+
+_cache = OrderedDict()
+_cache_version = None
+_lock = threading.Lock()
+
+def cached(func):
+    """Caches the results of a card_decks read until the data changes.
+
+    Calls are keyed by the values of all the parameters, defaults included,
+    so that filter_decks() and filter_decks(None, ..., None) share an entry.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        global _cache_version
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__name__, tuple(bound.arguments.values()))
+        version = cd.data_version()
+        with _lock:
+            if _cache_version != version:
+                _cache.clear()
+                _cache_version = version
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+
+        result = func(*args, **kwargs)
+
+        with _lock:
+            # Do not store results of reads that raced with a write
+            if result is not None and _cache_version == version == cd.data_version():
+                _cache[key] = result
+                if len(_cache) > MAX_ENTRIES:
+                    _cache.popitem(last=False)
+        return result
+    return wrapper
+
+def clear():
+    """Empties the cache."""
+    with _lock:
+        _cache.clear()
+
+get_records = cached(cd.get_records)
+get_decks = cached(cd.get_decks)
+get_deck_by_id = cached(cd.get_deck_by_id)
+get_deck_images = cached(cd.get_deck_images)
+get_image_by_hash = cached(cd.get_image_by_hash)
+filter_decks = cached(cd.filter_decks)
@@ -1,3 +1,5 @@
+import argparse
+import multiprocessing
 import os
 import sys
 from pathlib import Path
@@ -10,12 +12,40 @@ def resolve_path(path: str) -> str:
     return str(Path(base_path) / path)
 
 
+def env_flag(name: str) -> bool:
+    return os.environ.get(name, "") not in ("", "0")
+
+
 if __name__ == "__main__":
+    # The PDF catalogue renders pages in worker processes, which a frozen
+    # build starts by running this executable again
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="Runs the Baralhos app")
+    parser.add_argument("--warmup", action="store_true", default=env_flag("BARALHOS_WARMUP"),
+                        help="Migrate, preload the database and prime caches before serving (env BARALHOS_WARMUP=1)")
+    parser.add_argument("--pull-db", action="store_true", default=env_flag("BARALHOS_PULL_DB"),
+                        help="During warm-up, first pull the latest card_decks.db from GitHub using GITHUB_TOKEN (env BARALHOS_PULL_DB=1)")
+    parser.add_argument("--maintenance-hours", type=float, default=float(os.environ.get("BARALHOS_MAINTENANCE_HOURS", 0)),
+                        help="Check, analyze and compact card_decks.db every N hours in the background (env BARALHOS_MAINTENANCE_HOURS)")
+    args, streamlit_args = parser.parse_known_args()
+
+    if args.warmup:
+        # Runs in this process, so the primed caches are the ones the app uses
+        import warmup
+
+        warmup.run_warmup(pull=args.pull_db, token=os.environ.get("GITHUB_TOKEN"))
+
+    if args.maintenance_hours > 0:
+        import db_maintenance
+
+        db_maintenance.start_scheduler(args.maintenance_hours)
+
     sys.argv = [
         "streamlit",
         "run",
         resolve_path("baralhos.py"),
         "--global.developmentMode=false",
         "--server.headless=true",
-    ]
-    sys.exit(stcli.main())
\ No newline at end of file
+    ] + streamlit_args
+    sys.exit(stcli.main())
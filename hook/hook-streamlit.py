@@ -1,4 +1,4 @@
-import site
+import os
 
 from PyInstaller.utils.hooks import (
     collect_data_files,
@@ -6,8 +6,18 @@ from PyInstaller.utils.hooks import (
     copy_metadata,
 )
 
-site_packages_dir = site.getsitepackages()[0]
-datas = [(f"{site_packages_dir}/streamlit/runtime", "./streamlit/runtime")]
 datas = copy_metadata("streamlit")
 datas += collect_data_files("streamlit")
-hiddenimports = collect_submodules("streamlit")
\ No newline at end of file
+
+# baralhos.spec records the submodules the app really imports (see
+# record_modules.py); other builds get every submodule except the test
+# harness and third-party integrations the app does not use.
+modules_file = os.environ.get("BARALHOS_STREAMLIT_MODULES")
+if modules_file:
+    with open(modules_file) as f:
+        hiddenimports = f.read().split()
+else:
+    hiddenimports = collect_submodules(
+        "streamlit",
+        filter=lambda name: not name.startswith(("streamlit.testing", "streamlit.external")),
+    )
@@ -0,0 +1,73 @@
+"""Records the Streamlit submodules the app actually imports.
+
+Starts the server side of Streamlit (without listening) and renders every
+page through AppTest with a logged-in session, in a fresh interpreter and on
+a copy of the database, then writes the imported streamlit.* modules, one per
+line. baralhos.spec bundles only these instead of every Streamlit submodule.
+
+Usage:
+    python hook/record_modules.py [--output streamlit_modules.txt]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RECORD_SCRIPT = """
+import sys
+
+import bcrypt
+import streamlit.web.bootstrap
+import streamlit.web.cli
+import streamlit.web.server.server
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_file({script!r}, default_timeout=60)
+at.secrets["VALID_PASSWORD"] = bcrypt.hashpw(b"record", bcrypt.gensalt()).decode()
+at.secrets["VALID_USERNAME"] = "record"
+at.run()
+at.text_input[0].input("record")
+at.text_input[1].input("record")
+at.button[0].click()
+at.run()
+for label in at.sidebar.radio[0].options:
+    at.sidebar.radio[0].set_value(label)
+    at.run()
+    assert not at.exception, (label, at.exception)
+at.query_params["page"] = "diagnostics"
+at.run()
+assert not at.exception, at.exception
+
+for name in sorted(sys.modules):
+    if name.split(".")[0] == "streamlit" and not name.startswith("streamlit.testing"):
+        print(name)
+"""
+
+def record_modules():
+    """Returns the sorted list of streamlit modules imported by the app"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    with tempfile.TemporaryDirectory() as workdir:
+        for file_name in ("card_decks.db", "baralhos.png"):
+            shutil.copy(os.path.join(ROOT, file_name), workdir)
+        result = subprocess.run(
+            [sys.executable, "-c", RECORD_SCRIPT.format(script=os.path.join(ROOT, "baralhos.py"))],
+            cwd=workdir, env=env, capture_output=True, text=True, check=True
+        )
+    return [line for line in result.stdout.splitlines() if line.startswith("streamlit")]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="streamlit_modules.txt")
+    args = parser.parse_args()
+
+    modules = record_modules()
+    with open(args.output, "w") as f:
+        f.write("\n".join(modules) + "\n")
+    print(f"{len(modules)} streamlit modules written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+"""HTTP/JSON service over card_decks, for programmatic access without the UI.
+
+Usage:
+    python service.py [--host 127.0.0.1] [--port 8600] [--pool 8]
+
+Endpoints:
+    GET    /health
+    GET    /lookups/<table>                   records of a reference table
+    POST   /lookups/<table>                   {"name": ...}
+    GET    /decks?type_id=..&country_id=..    filter (any of the 8 ids)
+    GET    /search?q=...                      search descriptions and names
+    GET    /decks/<id>                        deck with its image list (ETag)
+    POST   /decks                             {"type_id": .., ..., "images": [base64 file, ...]}
+    PATCH  /decks/<id>                        changed columns (If-Match: ETag)
+    GET    /decks/<id>/images/<image_id>      JPEG thumbnail (ETag)
+    GET    /images/<sha256>.jpg               JPEG thumbnail by content hash (immutable)
+    POST   /decks/<id>/images                 image file as the request body
+    DELETE /decks/<id>/images/<image_id>
+    PUT    /decks/<id>/images                 [image_id, ...] new order
+
+Write endpoints need "Authorization: Bearer <BARALHOS_API_TOKEN>" and are
+disabled when that environment variable is not set. JSON responses are
+gzipped for clients that accept it. Thumbnails are best fetched at their
+content-hash URL (/images/<sha256>.jpg, as listed in the deck response):
+its content can never change, so browsers and proxies may cache it forever.
+
+The server is a small asyncio HTTP/1.1 implementation; card_decks calls run
+in a thread pool over pooled connections. handle() takes a Request and
+returns a Response without any networking, for use in tests and scripts.
+"""
+import argparse
+import asyncio
+import base64
+import gzip
+import hmac
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import card_decks as cd
+import deck_cache as dcache
+
+# Deck column -> reference table it points to
+REFERENCES = {
+    "type_id": "types",
+    "number_id": "numbers",
+    "theme_id": "themes",
+    "game_id": "games",
+    "city_id": "cities",
+    "country_id": "countries",
+    "collection_id": "collections",
+    "manufacturer_id": "manufacturers",
+}
+FILTERS = list(REFERENCES)
+GZIP_MIN_BYTES = 1024
+MAX_BODY_BYTES = 20 * 1024 * 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+    401: "Unauthorized", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+    412: "Precondition Failed", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+@dataclass
+class Request:
+    method: str
+    target: str
+    headers: Dict[str, str] = field(default_factory=dict)  # lower-case names
+    body: bytes = b""
+
+    @property
+    def path(self) -> str:
+        return urlsplit(self.target).path
+
+    @property
+    def query(self) -> Dict[str, str]:
+        return {name: values[-1] for name, values in parse_qs(urlsplit(self.target).query).items()}
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            raise HTTPError(400, "Invalid JSON body")
+
+@dataclass
+class Response:
+    status: int = 200
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+class HTTPError(Exception):
+    def __init__(self, status, message=""):
+        super().__init__(message)
+        self.status = status
+        self.message = message or REASONS.get(status, "")
+
+def json_response(data, status=200, headers=None):
+    return Response(
+        status,
+        {"Content-Type": "application/json; charset=utf-8", **(headers or {})},
+        json.dumps(data, ensure_ascii=False).encode("utf-8"),
+    )
+
+def deck_to_dict(deck):
+    keys = ["id", "type", "number", "theme", "game", "city", "country", "collection", "manufacturer", "description"]
+    return dict(zip(keys, deck))
+
+def image_url(image_hash):
+    """Immutable URL of a thumbnail, named by its content hash"""
+    return f"/images/{image_hash}.jpg"
+
+def deck_etag(deck_id, updated_at):
+    return f'"deck-{deck_id}-{updated_at}"'
+
+def not_modified(request, etag):
+    """True if the client's If-None-Match matches etag"""
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+class Service:
+    """Routes requests to card_decks. Blocking calls run in a thread pool."""
+
+    def __init__(self, pool_size=8, api_token=None):
+        cd.use_connection_pool(pool_size)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="card_decks")
+        self.api_token = api_token if api_token is not None else os.environ.get("BARALHOS_API_TOKEN")
+        self.routes = [
+            ("GET", r"/health", self.health),
+            ("GET", r"/lookups/(?P<table>\w+)", self.get_lookup),
+            ("POST", r"/lookups/(?P<table>\w+)", self.add_lookup),
+            ("GET", r"/decks", self.filter_decks),
+            ("POST", r"/decks", self.add_deck),
+            ("GET", r"/search", self.search_decks),
+            ("GET", r"/decks/(?P<deck_id>\d+)", self.get_deck),
+            ("PATCH", r"/decks/(?P<deck_id>\d+)", self.update_deck),
+            ("POST", r"/decks/(?P<deck_id>\d+)/images", self.add_image),
+            ("PUT", r"/decks/(?P<deck_id>\d+)/images", self.reorder_images),
+            ("GET", r"/decks/(?P<deck_id>\d+)/images/(?P<image_id>\d+)", self.get_image),
+            ("DELETE", r"/decks/(?P<deck_id>\d+)/images/(?P<image_id>\d+)", self.delete_image),
+            ("GET", r"/images/(?P<image_hash>[0-9a-f]{64})\.jpg", self.get_image_by_hash),
+        ]
+
+    async def call(self, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: function(*args, **kwargs))
+
+    async def handle(self, request: Request) -> Response:
+        """Answers one request"""
+        try:
+            response = await self.dispatch(request)
+        except HTTPError as e:
+            response = json_response({"error": e.message}, e.status)
+        except cd.ConcurrentEditError as e:
+            response = json_response({"error": str(e)}, 412)
+        except Exception as e:
+            response = json_response({"error": f"{type(e).__name__}: {e}"}, 500)
+        return compress(request, response)
+
+    async def dispatch(self, request):
+        path_matched = False
+        for method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, request.path.rstrip("/") or "/")
+            if not match:
+                continue
+            path_matched = True
+            if method == request.method or (method == "GET" and request.method == "HEAD"):
+                if method != "GET":
+                    self.check_token(request)
+                return await handler(request, **match.groupdict())
+        raise HTTPError(405 if path_matched else 404)
+
+    def check_token(self, request):
+        if not self.api_token:
+            raise HTTPError(403, "Writes are disabled: BARALHOS_API_TOKEN is not set")
+        authorization = request.headers.get("authorization", "")
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {self.api_token}".encode()):
+            raise HTTPError(401)
+
+    async def health(self, request):
+        return json_response({"status": "ok", "data_version": cd.data_version()[0]})
+
+    async def get_lookup(self, request, table):
+        if table not in cd.TABLES:
+            raise HTTPError(404, f"Unknown table: {table}")
+        records = await self.call(dcache.get_records, table)
+        return json_response([{"id": record_id, "name": name} for record_id, name in records])
+
+    async def add_lookup(self, request, table):
+        if table not in cd.TABLES:
+            raise HTTPError(404, f"Unknown table: {table}")
+        name = (request.json() or {}).get("name")
+        if not name:
+            raise HTTPError(400, "Missing name")
+        if not await self.call(cd.add_record, table, name):
+            raise HTTPError(400, f"Record '{name}' already exists or there was an error")
+        return json_response({"table": table, "name": name}, 201)
+
+    async def filter_decks(self, request):
+        query = request.query
+        try:
+            ids = {name: int(query[name]) for name in FILTERS if name in query}
+        except ValueError:
+            raise HTTPError(400, "Filter ids must be integers")
+        decks = await self.call(dcache.filter_decks, with_images=False, **ids)
+        return json_response([deck_to_dict(deck) for deck in decks])
+
+    async def search_decks(self, request):
+        text = request.query.get("q", "")
+        if not text:
+            raise HTTPError(400, "Missing q")
+        decks = await self.call(cd.search_decks, text)
+        return json_response([deck_to_dict(deck) for deck in decks])
+
+    async def get_deck(self, request, deck_id):
+        deck = await self.call(dcache.get_deck_by_id, int(deck_id))
+        if not deck:
+            raise HTTPError(404, f"Deck {deck_id} not found")
+        etag = deck_etag(deck[0], deck[11])
+        if not_modified(request, etag):
+            return Response(304, {"ETag": etag})
+        images = await self.call(dcache.get_deck_images, int(deck_id))
+        data = deck_to_dict(deck)
+        data["updated_at"] = deck[11]
+        data["images"] = [
+            {"id": image_id, "hash": image_hash, "url": image_url(image_hash)}
+            for image_id, image_hash, _ in images
+        ]
+        return json_response(data, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    async def check_references(self, data):
+        """Raises a 400 unless every reference id in data is an integer id
+        of an existing record. Foreign keys are not enforced by SQLite here,
+        and a deck pointing nowhere would vanish from every listing."""
+        for name, table in REFERENCES.items():
+            if name not in data:
+                continue
+            value = data[name]
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise HTTPError(400, f"{name} must be an integer")
+            records = await self.call(dcache.get_records, table)
+            if value not in {record[0] for record in records}:
+                raise HTTPError(400, f"{name} {value} does not exist in {table}")
+
+    async def add_deck(self, request):
+        data = request.json()
+        if not isinstance(data, dict) or any(name not in data for name in FILTERS):
+            raise HTTPError(400, f"Expected {', '.join(FILTERS)} and optional base64 images")
+        await self.check_references(data)
+        try:
+            images = [base64.b64decode(image) for image in data.get("images", [])]
+        except (TypeError, ValueError):
+            raise HTTPError(400, "Images must be base64 encoded")
+        ids = [data[name] for name in FILTERS]
+        deck_id = await self.call(cd.add_deck, *ids, data.get("description", ""), images)
+        if not deck_id:
+            raise HTTPError(400, "Could not add the deck")
+        return json_response({"id": deck_id}, 201, {"Location": f"/decks/{deck_id}"})
+
+    async def update_deck(self, request, deck_id):
+        changes = request.json()
+        if not isinstance(changes, dict) or "images" in changes:
+            raise HTTPError(400, "Expected an object with the changed columns (images have their own endpoints)")
+        # cd.update_deck cannot tell a missing deck from a concurrent edit
+        if not await self.call(dcache.get_deck_by_id, int(deck_id)):
+            raise HTTPError(404, f"Deck {deck_id} not found")
+        await self.check_references(changes)
+        expected_updated_at = None
+        if_match = request.headers.get("if-match")
+        if if_match:
+            prefix = f'"deck-{deck_id}-'
+            if not (if_match.startswith(prefix) and if_match.endswith('"')):
+                raise HTTPError(412, "If-Match does not match this deck")
+            expected_updated_at = if_match[len(prefix):-1]
+        try:
+            updated_at = await self.call(cd.update_deck, int(deck_id), changes, expected_updated_at)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        if updated_at is None:
+            raise HTTPError(500, "Database error")
+        return json_response({"id": int(deck_id), "updated_at": updated_at}, headers={"ETag": deck_etag(deck_id, updated_at)})
+
+    async def find_image(self, deck_id, image_id):
+        for found_id, image_hash, data in await self.call(dcache.get_deck_images, int(deck_id)):
+            if found_id == int(image_id):
+                return image_hash, data
+        raise HTTPError(404, f"Image {image_id} of deck {deck_id} not found")
+
+    async def get_image(self, request, deck_id, image_id):
+        image_hash, data = await self.find_image(deck_id, image_id)
+        etag = f'"{image_hash}"'
+        if not_modified(request, etag):
+            return Response(304, {"ETag": etag})
+        return Response(200, {"Content-Type": "image/jpeg", "ETag": etag, "Cache-Control": "no-cache"}, base64.b64decode(data))
+
+    async def get_image_by_hash(self, request, image_hash):
+        # The URL names the content, so the response never changes
+        etag = f'"{image_hash}"'
+        headers = {"ETag": etag, "Cache-Control": IMMUTABLE}
+        if not_modified(request, etag):
+            return Response(304, headers)
+        data = await self.call(dcache.get_image_by_hash, image_hash)
+        if data is None:
+            raise HTTPError(404, f"Image {image_hash} not found")
+        return Response(200, {"Content-Type": "image/jpeg", **headers}, base64.b64decode(data))
+
+    async def add_image(self, request, deck_id):
+        if not request.body:
+            raise HTTPError(400, "Expected the image file as the request body")
+        if not await self.call(dcache.get_deck_by_id, int(deck_id)):
+            raise HTTPError(404, f"Deck {deck_id} not found")
+        image_id = await self.call(cd.add_deck_image, int(deck_id), request.body)
+        if image_id is None:
+            raise HTTPError(400, "Could not add the image")
+        location = f"/decks/{deck_id}/images/{image_id}"
+        image_hash = next(found_hash for found_id, found_hash, _ in await self.call(dcache.get_deck_images, int(deck_id)) if found_id == image_id)
+        return json_response({"id": image_id, "hash": image_hash, "url": image_url(image_hash)}, 201, {"Location": location})
+
+    async def delete_image(self, request, deck_id, image_id):
+        if not await self.call(cd.delete_deck_image, int(deck_id), image_id=int(image_id)):
+            raise HTTPError(404, f"Image {image_id} of deck {deck_id} not found")
+        return Response(204)
+
+    async def reorder_images(self, request, deck_id):
+        order = request.json()
+        if not isinstance(order, list):
+            raise HTTPError(400, "Expected a list of image ids or hashes")
+        if not await self.call(dcache.get_deck_by_id, int(deck_id)):
+            raise HTTPError(404, f"Deck {deck_id} not found")
+        if not await self.call(cd.reorder_deck_images, int(deck_id), order):
+            raise HTTPError(500, "Database error")
+        return Response(204)
+
+def compress(request, response):
+    """Gzips JSON bodies for clients that accept it"""
+    content_type = response.headers.get("Content-Type", "")
+    if (
+        len(response.body) >= GZIP_MIN_BYTES
+        and content_type.startswith("application/json")
+        and "gzip" in request.headers.get("accept-encoding", "")
+    ):
+        response.body = gzip.compress(response.body, compresslevel=5)
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+async def read_request(reader) -> Optional[Request]:
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = headers.get("content-length", "0") or "0"
+    if not (length.isascii() and length.isdigit()):
+        raise HTTPError(400, "Invalid Content-Length")
+    length = int(length)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413)
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target, headers, body)
+
+def write_response(writer, request, response, keep_alive):
+    headers = {
+        "Content-Length": str(len(response.body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+        **response.headers,
+    }
+    head = f"HTTP/1.1 {response.status} {REASONS.get(response.status, '')}\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+    writer.write(head.encode("latin-1"))
+    if request is None or request.method != "HEAD":
+        writer.write(response.body)
+
+async def serve(host="127.0.0.1", port=8600, pool_size=8):
+    service = Service(pool_size)
+
+    async def on_connection(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HTTPError as e:
+                    write_response(writer, None, json_response({"error": e.message}, e.status), False)
+                    break
+                if request is None:
+                    break
+                response = await service.handle(request)
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                write_response(writer, request, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(on_connection, host, port)
+    print(f"Serving card_decks on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--pool", type=int, default=8, help="Database connections and worker threads")
+    args = parser.parse_args()
+    cd.init_db()
+    try:
+        asyncio.run(serve(args.host, args.port, args.pool))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import card_decks as cd
+
+# Opt-in tracing of the SQL run by card_decks.
+#
+# Enable with the BARALHOS_SQL_TRACE=1 environment variable (or enable()).
+# Every statement is recorded with its duration (execute plus fetches), the
+# rows it returned or changed, and the SQLite virtual machine steps it took
+# (counted with the progress handler). The trace callback counts the
+# statements SQLite actually ran for it, which includes trigger programs and
+# each row of an executemany. Statements slower than
+# BARALHOS_SLOW_QUERY_MS (default 100) are logged with their query plan once
+# they are complete: when their last row is fetched, their cursor is closed
+# or the next statement starts on the connection.
+# Statements are grouped per Streamlit rerun with begin_rerun()/end_rerun().
+
+logger = logging.getLogger("card_decks.sql")
+
+PROGRESS_STEPS = 100  # VM instructions between progress handler calls
+
+@dataclass
+class Statement:
+    """One SQL statement run through card_decks"""
+
+    sql: str
+    parameters: tuple = ()
+    ms: float = 0.0
+    rows: int = 0
+    steps: int = 0
+    sqlite_statements: int = 0
+    done: bool = False
+
+@dataclass
+class RerunTrace:
+    """The statements of one rerun of the app"""
+
+    statements: List[Statement] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(statement.ms for statement in self.statements)
+
+    def summary(self) -> dict:
+        """Number of statements, time, rows and steps of the rerun"""
+        return {
+            "statements": len(self.statements),
+            "ms": self.total_ms,
+            "rows": sum(statement.rows for statement in self.statements),
+            "steps": sum(statement.steps for statement in self.statements),
+            "sqlite_statements": sum(statement.sqlite_statements for statement in self.statements),
+        }
+
+_state = threading.local()
+_settings = {
+    "enabled": os.environ.get("BARALHOS_SQL_TRACE", "") not in ("", "0"),
+    "threshold_ms": float(os.environ.get("BARALHOS_SLOW_QUERY_MS", "100")),
+}
+
+class TracingCursor(sqlite3.Cursor):
+    """Cursor timing its statements and counting their rows"""
+
+    _statement: Optional[Statement] = None
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters, many=True)
+
+    def _run(self, method, sql, parameters, many=False):
+        # The statement before on this connection is done once another starts
+        _finish(self.connection._current)
+        statement = Statement(sql=" ".join(sql.split()), parameters=() if many else tuple(parameters))
+        self._statement = statement
+        self.connection._current = statement
+        _record(statement)
+        steps_before = self.connection._steps
+        start = time.perf_counter()
+        try:
+            return method(sql, parameters)
+        finally:
+            statement.ms += (time.perf_counter() - start) * 1000
+            statement.steps += self.connection._steps - steps_before
+            if self.rowcount > 0:
+                statement.rows = self.rowcount
+            # Statements returning no rows are done, the others when fetched
+            if self.description is None:
+                _finish(statement)
+
+    def _fetch(self, method, *args):
+        statement = self._statement
+        if statement is None or statement.done:
+            return method(*args)
+        steps_before = self.connection._steps
+        start = time.perf_counter()
+        result, done = None, True
+        try:
+            result = method(*args)
+            if isinstance(result, list):
+                statement.rows += len(result)
+                # fetchall, or a short fetchmany batch, reads the last rows
+                done = not args or len(result) < args[0]
+            elif result is not None:
+                statement.rows += 1
+                done = False
+        finally:
+            statement.ms += (time.perf_counter() - start) * 1000
+            statement.steps += self.connection._steps - steps_before
+            if done:
+                _finish(statement)
+        return result
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, size if size is not None else self.arraysize)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def __next__(self):
+        row = self._fetch(super().fetchone)
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        _finish(self._statement)
+        super().close()
+
+class TracingConnection(sqlite3.Connection):
+    """Connection whose cursors are TracingCursors"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._steps = 0
+        self._current = None
+        self.set_trace_callback(self._trace)
+        self.set_progress_handler(self._progress, PROGRESS_STEPS)
+
+    def _trace(self, sql):
+        # Transaction control is issued implicitly by the sqlite3 module
+        if self._current is not None and not sql.startswith(("BEGIN", "COMMIT", "ROLLBACK")):
+            self._current.sqlite_statements += 1
+
+    def _progress(self):
+        self._steps += PROGRESS_STEPS
+        return 0
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def _record(statement):
+    trace = getattr(_state, "rerun", None)
+    if trace is not None:
+        trace.statements.append(statement)
+
+def _finish(statement):
+    # Called once the statement is complete, so that a slow query is logged
+    # with all its rows and time
+    if statement is None or statement.done:
+        return
+    statement.done = True
+    if statement.ms < _settings["threshold_ms"]:
+        return
+    logger.warning(
+        "Slow query: %.1f ms, %d rows, %d steps: %s %s\n%s",
+        statement.ms, statement.rows, statement.steps, statement.sql, statement.parameters,
+        "\n".join(query_plan(statement.sql, statement.parameters)),
+    )
+
+def query_plan(sql, parameters=()):
+    """EXPLAIN QUERY PLAN of a statement, as lines"""
+    if sql.split(None, 1)[0].upper() not in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        return []
+    conn = sqlite3.connect(cd.DB_PATH)
+    try:
+        return [f"  {row[3]}" for row in conn.execute("EXPLAIN QUERY PLAN " + sql, parameters)]
+    except sqlite3.Error as e:
+        return [f"  (no plan: {e})"]
+    finally:
+        conn.close()
+
+def enabled():
+    """True if tracing is on"""
+    return _settings["enabled"]
+
+def enable(threshold_ms=None):
+    """Turns tracing on for the connections opened from now on"""
+    _settings["enabled"] = True
+    if threshold_ms is not None:
+        _settings["threshold_ms"] = threshold_ms
+    cd.connection_factory = TracingConnection
+
+def disable():
+    """Turns tracing off for the connections opened from now on"""
+    _settings["enabled"] = False
+    cd.connection_factory = sqlite3.Connection
+
+def begin_rerun():
+    """Starts collecting the statements run by the current thread"""
+    _state.rerun = RerunTrace()
+    return _state.rerun
+
+def end_rerun():
+    """Stops collecting and returns the RerunTrace of the current thread
+
+    Statements whose rows were not all fetched are considered done.
+    """
+    trace = getattr(_state, "rerun", None)
+    _state.rerun = None
+    if trace is None:
+        return RerunTrace()
+    for statement in trace.statements:
+        _finish(statement)
+    return trace
+
+if _settings["enabled"]:
+    enable()
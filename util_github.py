@@ -1,8 +1,13 @@
 from github import Github
 from github.GithubException import UnknownObjectException, GithubException
+import hashlib
 import os
+import tempfile
+
+from util_timer import timed
 
 # Upload/download to/from GitHub
+@timed()
 def upload_binary_to_github(token, repo_name, file_path, commit_message, branch="main"):
     """Uploads a binary file to a GitHub repository.
 
@@ -51,6 +56,7 @@ def upload_binary_to_github(token, repo_name, file_path, commit_message, branch=
         print(f"An unexpected error occurred: {e}")
         return False
 
+@timed()
 def download_binary_from_github(token, repo_name, file_path, branch="main"):
     """Downloads a binary file from a GitHub repository.
 
@@ -95,7 +101,144 @@ def download_binary_from_github(token, repo_name, file_path, branch="main"):
         print(f"An unexpected error occurred: {e}")
         return False
 
-def upload_to_github(token, repo_name, file_path, commit_message, branch='main'):
+def git_blob_sha(file_path, chunk_size=1024 * 1024):
+    """Returns the git blob SHA of a local file (as GitHub reports it)."""
+    # sha1 of "blob <size>\0" followed by the content
+    blob_sha = hashlib.sha1(f"blob {os.path.getsize(file_path)}\0".encode())
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            blob_sha.update(chunk)
+    return blob_sha.hexdigest()
+
+def read_cached_sha(file_path):
+    """Returns the SHAs recorded for a local file by its last sync.
+
+    Returns:
+        tuple: The SHA of the remote blob and the blob SHA the local file had
+            then, (None, None) if there was no sync.
+    """
+    try:
+        with open(file_path + ".sha") as f:
+            shas = f.read().split()
+    except OSError:
+        return None, None
+    if not shas:
+        return None, None
+    # Files written before the local SHA was recorded hold only the remote one
+    return shas[0], shas[1] if len(shas) > 1 else shas[0]
+
+def write_cached_sha(file_path, remote_sha, local_sha=None):
+    """Records the SHAs of a synced file next to it, in <file_path>.sha.
+
+    Args:
+        file_path (str): The local file.
+        remote_sha (str): SHA of the blob in the repository.
+        local_sha (str, optional): Blob SHA of the local file. Computed
+            when not given.
+    """
+    local_sha = local_sha or git_blob_sha(file_path)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), prefix=".sha-")
+    with os.fdopen(fd, "w") as f:
+        f.write(f"{remote_sha} {local_sha}")
+    os.replace(temp_path, file_path + ".sha")
+
+@timed()
+def sync_binary_from_github(token, repo_name, file_path, branch="main", local_path=None):
+    """Downloads a file from a GitHub repository only if it changed.
+
+    The SHA of the remote blob is read from a listing of its directory
+    (without downloading the content) and compared with the blob SHA of
+    the local file, and with the SHAs recorded by the previous sync in
+    <local_path>.sha. The file is only downloaded when the remote blob
+    changed since that sync and the local file did not: local changes that
+    were not uploaded yet are never overwritten. The download is streamed
+    to a temporary file next to local_path, checked against the blob SHA,
+    and moved over local_path atomically.
+
+    Args:
+        token (str): Personal access token from GitHub.
+        repo_name (str): Name of the GitHub repository (owner/repo).
+        file_path (str): Path to the file in the repository.
+        branch (str, optional): The branch to download from. Defaults to "main".
+        local_path (str, optional): Where to store the file. Defaults to the
+            base name of file_path in the current directory.
+
+    Returns:
+        str: "unchanged" or "downloaded", or None if the sync failed or both
+            copies changed.
+    """
+    import requests  # Installed with PyGithub
+
+    local_path = local_path or os.path.basename(file_path)
+    try:
+        g = Github(token)
+        repo = g.get_repo(repo_name)
+
+        directory, file_name = os.path.split(file_path)
+        entries = [entry for entry in repo.get_contents(directory, ref=branch) if entry.name == file_name]
+        if not entries:
+            print(f"File '{file_path}' not found in repository '{repo_name}' on branch '{branch}'.")
+            return None
+        remote = entries[0]
+
+        if os.path.exists(local_path):
+            local_sha = git_blob_sha(local_path)
+            if local_sha == remote.sha:
+                write_cached_sha(local_path, remote.sha, local_sha)
+                print(f"'{local_path}' is up to date with '{repo_name}' ({remote.sha[:7]}).")
+                return "unchanged"
+            synced_remote_sha, synced_local_sha = read_cached_sha(local_path)
+            if synced_local_sha is not None and local_sha != synced_local_sha:
+                if remote.sha == synced_remote_sha:
+                    print(f"'{local_path}' has changes not uploaded to '{repo_name}' yet, keeping it.")
+                    return "unchanged"
+                print(f"Both '{local_path}' and '{file_path}' in '{repo_name}' changed since the last sync, keeping the local file.")
+                return None
+            if remote.sha == synced_remote_sha:
+                print(f"'{local_path}' is up to date with '{repo_name}' ({remote.sha[:7]}).")
+                return "unchanged"
+
+        # Git blob SHA: sha1 of "blob <size>\0" followed by the content
+        blob_sha = hashlib.sha1(f"blob {remote.size}\0".encode())
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(local_path)), prefix=".download-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                with requests.get(remote.download_url, headers={"Authorization": f"token {token}"}, stream=True, timeout=60) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        f.write(chunk)
+                        blob_sha.update(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            if blob_sha.hexdigest() != remote.sha:
+                print(f"Downloaded '{file_path}' does not match its SHA {remote.sha}, keeping the local file.")
+                os.remove(temp_path)
+                return None
+            os.replace(temp_path, local_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        write_cached_sha(local_path, remote.sha, remote.sha)
+        print(f"Successfully downloaded '{file_path}' from '{repo_name}' on branch '{branch}' ({remote.sha[:7]}).")
+        return "downloaded"
+
+    except UnknownObjectException as e:
+        print(f"Repository '{repo_name}' not found or you don't have access: {e}")
+        return None
+    except GithubException as e:
+        print(f"A GitHub error occurred: {e}")
+        return None
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return None
+
+@timed()
+def upload_to_github(token, repo_name, file_path, commit_message, branch='main', local_path=None):
     """Uploads a file to a GitHub repository.
 
     Args:
@@ -104,6 +247,10 @@ def upload_to_github(token, repo_name, file_path, commit_message, branch='main')
         file_path (str): Full path to the file you want to upload.
         commit_message (str): Commit message for the upload.
         branch (str): Name of the branch where the file is located (default: 'main').
+        local_path (str, optional): Local copy of the file (e.g. when a
+            snapshot of it is uploaded). The SHA of the uploaded blob and
+            the blob SHA of local_path are recorded for it, so
+            sync_binary_from_github does not download the file back.
 
     Returns:
         bool: True on successful upload, False otherwise.
@@ -126,7 +273,9 @@ def upload_to_github(token, repo_name, file_path, commit_message, branch='main')
             content = file.read()
 
         # Create the file in the specified branch (default: main)
-        repo.create_file(os.path.basename(file_path), commit_message, content, branch=branch)
+        result = repo.create_file(os.path.basename(file_path), commit_message, content, branch=branch)
+        if local_path:
+            write_cached_sha(local_path, result["content"].sha)
         print(f"Successfully uploaded {file_path} to {repo_name}")
         return True
 
@@ -140,6 +289,7 @@ def upload_to_github(token, repo_name, file_path, commit_message, branch='main')
         print(f"An unexpected error occurred: {e}")
         return False
 
+@timed()
 def delete_from_github(token, repo_name, file_path, commit_message, branch='main'):
     """Deleta um arquivo de um repositório no GitHub.
 
@@ -1,16 +1,123 @@
+import functools
+import json
+import math
+import threading
 import time
+from collections import deque
 from contextlib import ContextDecorator
 from dataclasses import dataclass, field
-from typing import Any, Callable, ClassVar, Dict, Optional
+from typing import Any, Callable, ClassVar, Deque, Dict, List, Optional
 
 class TimerError(Exception):
     """A custom exception used to report errors in use of Timer class"""
 
+class Metrics:
+    """Thread-safe registry of timing histograms, by name"""
+
+    def __init__(self, max_samples: int = 1024) -> None:
+        """Percentiles are computed over the last max_samples observations of each name"""
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._totals: Dict[str, float] = {}
+        self._maxima: Dict[str, float] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record one duration for name"""
+        with self._lock:
+            if name not in self._counts:
+                self._counts[name] = 0
+                self._totals[name] = 0.0
+                self._maxima[name] = 0.0
+                self._samples[name] = deque(maxlen=self.max_samples)
+            self._counts[name] += 1
+            self._totals[name] += seconds
+            self._maxima[name] = max(self._maxima[name], seconds)
+            self._samples[name].append(seconds)
+
+    def reset(self) -> None:
+        """Forget all observations"""
+        with self._lock:
+            self._counts.clear()
+            self._totals.clear()
+            self._maxima.clear()
+            self._samples.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, total, p50, p95, p99 and max (in seconds) of every name"""
+        with self._lock:
+            snapshot = {
+                name: (self._counts[name], self._totals[name], self._maxima[name], sorted(self._samples[name]))
+                for name in self._counts
+            }
+        return {
+            name: {
+                "count": count,
+                "total": total,
+                "p50": _percentile(samples, 50),
+                "p95": _percentile(samples, 95),
+                "p99": _percentile(samples, 99),
+                "max": maximum,
+            }
+            for name, (count, total, maximum, samples) in snapshot.items()
+        }
+
+    def to_json(self) -> str:
+        """Summary as a JSON document"""
+        return json.dumps(self.summary(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, metric: str = "baralhos_duration_seconds") -> str:
+        """Summary in the Prometheus text exposition format"""
+        summary = self.summary()
+        lines = [f"# TYPE {metric} summary"]
+        for name, stats in sorted(summary.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                lines.append(f'{metric}{{name="{label}",quantile="{quantile}"}} {stats[key]}')
+            lines.append(f'{metric}_sum{{name="{label}"}} {stats["total"]}')
+            lines.append(f'{metric}_count{{name="{label}"}} {stats["count"]}')
+        lines.append(f"# TYPE {metric}_max gauge")
+        for name, stats in sorted(summary.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{metric}_max{{name="{label}"}} {stats["max"]}')
+        return "\n".join(lines) + "\n"
+
+def _percentile(samples: List[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, math.ceil(percent * len(samples) / 100) - 1))
+    return samples[rank]
+
+# Process-wide registry used by Timer and timed
+metrics = Metrics()
+
+def timed(name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator recording the duration of every call in metrics, under name
+    (by default module.function)"""
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        metric_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start_time = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe(metric_name, time.perf_counter() - start_time)
+
+        return wrapper
+
+    return decorator
+
 @dataclass
 class Timer(ContextDecorator):
     """Time your code using a class, context manager, or decorator"""
 
     timers: ClassVar[Dict[str, float]] = {}
+    _timers_lock: ClassVar[threading.Lock] = threading.Lock()
     name: Optional[str] = None
     text: str = "Elapsed time: {:0.4f} seconds"
     logger: Optional[Callable[[str], None]] = print
@@ -19,7 +126,8 @@ class Timer(ContextDecorator):
     def __post_init__(self) -> None:
         """Initialization: add timer to dict of timers"""
         if self.name:
-            self.timers.setdefault(self.name, 0)
+            with self._timers_lock:
+                self.timers.setdefault(self.name, 0)
 
     def start(self) -> None:
         """Start a new timer"""
@@ -41,7 +149,9 @@ class Timer(ContextDecorator):
         if self.logger:
             self.logger(self.text.format(elapsed_time))
         if self.name:
-            self.timers[self.name] += elapsed_time
+            with self._timers_lock:
+                self.timers[self.name] += elapsed_time
+            metrics.observe(self.name, elapsed_time)
 
         return elapsed_time
 
@@ -52,4 +162,4 @@ class Timer(ContextDecorator):
 
     def __exit__(self, *exc_info: Any) -> None:
         """Stop the context manager timer"""
-        self.stop()
\ No newline at end of file
+        self.stop()
@@ -0,0 +1,85 @@
+import os
+import time
+
+import card_decks as cd
+import deck_cache as dcache
+from util_timer import metrics
+
+# Warm-up run by entrypoint.py before the server accepts requests, so that
+# the first user does not pay for migrations, cold database pages and empty
+# caches. Each step is timed (also recorded in util_timer.metrics as
+# warmup.<step>).
+
+REPO_NAME = "pbcachim/baralhos"
+
+# Steps run by run_warmup in this process, so that baralhos.py does not
+# pull or migrate the database a second time
+completed_steps = set()
+
+def pull_database(token):
+    """Downloads card_decks.db from GitHub if it changed since the last pull.
+
+    When a new file is swapped in, pooled connections to the old one are
+    closed, the new file is migrated (it may have an older schema) and the
+    data version is bumped, so deck_cache drops its results.
+    Returns "unchanged", "downloaded" or None (see sync_binary_from_github)."""
+    import util_github as ghub
+
+    status = ghub.sync_binary_from_github(token, REPO_NAME, os.path.basename(cd.DB_PATH), local_path=cd.DB_PATH)
+    if status == "downloaded":
+        cd.reset_connections()
+        cd.init_db()
+        cd.bump_data_version()
+    return status
+
+def preload_database(chunk_size=1024 * 1024):
+    """Reads the database file once so its pages are in the OS cache.
+
+    Returns the number of bytes read."""
+    size = 0
+    with open(cd.DB_PATH, "rb") as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+    return size
+
+def prime_caches():
+    """Loads the reference tables and the default listings into deck_cache"""
+    for table in cd.TABLES:
+        dcache.get_records(table)
+    dcache.filter_decks(with_images=False)
+    dcache.get_decks(with_images=False)
+
+def run_warmup(pull=False, token=None, logger=print):
+    """Runs the warm-up steps, returning their durations in seconds by name"""
+    steps = []
+    if pull:
+        if token:
+            steps.append(("pull", lambda: pull_database(token)))
+        else:
+            logger("Warm-up: no GitHub token, skipping the database pull")
+    steps += [
+        ("migrate", cd.init_db),
+        ("preload", preload_database),
+        ("prime_caches", prime_caches),
+    ]
+
+    timings = {}
+    start = time.perf_counter()
+    for name, step in steps:
+        step_start = time.perf_counter()
+        try:
+            step()
+            completed_steps.add(name)
+        except Exception as e:
+            logger(f"Warm-up step '{name}' failed: {e}")
+        timings[name] = time.perf_counter() - step_start
+        metrics.observe(f"warmup.{name}", timings[name])
+    timings["total"] = time.perf_counter() - start
+
+    logger("Warm-up: " + ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items()))
+    return timings